@@ -0,0 +1,161 @@
+#!/usr/bin/env bash
+# Runs inside the replay container (see verify.yml): writes a synthetic attack
+# log through every replay-<jail> jail and records, per jail, how fast fail2ban
+# ingests it and how long a ban takes. Writes one JSON document to $1.
+#
+#   REPLAY_LINES      log lines per jail (default: 1000000)
+#   REPLAY_ATTACK_PCT share of lines that are failures (default: 10)
+#   REPLAY_ATTACKERS  distinct attacking IPs (default: 500)
+#   REPLAY_TIMEOUT    seconds to wait for the probe ban (default: 900)
+#   REPLAY_JAILS      jail names without the replay- prefix (default: all)
+#
+# The log is REPLAY_LINES lines of benign traffic mixed with failures from
+# REPLAY_ATTACKERS addresses, followed by maxretry failures from one probe
+# address. The probe is banned only once fail2ban has read everything before
+# it, so time_to_ban_seconds is the time to ingest the whole burst, and
+# ban_lag_seconds is how far fail2ban was behind when the writer finished.
+set -euo pipefail
+
+OUT="${1:?usage: replay.sh <output.json>}"
+LINES="${REPLAY_LINES:-1000000}"
+ATTACK_PCT="${REPLAY_ATTACK_PCT:-10}"
+ATTACKERS="${REPLAY_ATTACKERS:-500}"
+TIMEOUT="${REPLAY_TIMEOUT:-900}"
+LOG_DIR=/var/log/fail2ban-replay
+PROBE=192.0.2.1
+
+WORK="$(mktemp -d)"
+trap 'rm -rf "$WORK"' EXIT
+
+jails="${REPLAY_JAILS:-$(fail2ban-client status | sed -n 's/.*Jail list:\s*//p' | tr ',' '\n' | sed -n 's/^\s*replay-//p')}"
+
+# gen <format> <count> <probe retries> -> log lines on stdout. Attackers are
+# 198.18.0.0/15 (benchmarking range), benign clients 10.0.0.0/8.
+gen() {
+  awk -v fmt="$1" -v n="$2" -v retries="$3" -v pct="$ATTACK_PCT" -v attackers="$ATTACKERS" \
+    -v probe="$PROBE" -v now="$(date +'%d/%b/%Y:%H:%M:%S %z')" '
+    function attacker(i) { return "198.18." int(i / 250) "." (i % 250 + 1) }
+    function client(i) { return "10." int(i / 65536) % 256 "." int(i / 256) % 256 "." (i % 254 + 1) }
+    function nginx(ip, req, status) {
+      printf "{\"time_local\":\"%s\",\"request_id\":\"%032d\",\"remote_addr\":\"%s\",\"host\":\"example.com\",\"request\":\"%s\",\"status\":%d,\"body_bytes_sent\":5120,\"request_time\":0.004,\"upstream_response_time\":\"0.004\",\"upstream_cache_status\":\"\",\"http_referer\":\"\",\"http_user_agent\":\"Mozilla/5.0 (X11; Linux x86_64)\",\"http_x_forwarded_for\":\"\"}\n", now, NR, ip, req, status
+    }
+    function line(bad, ip, i) {
+      if (fmt == "sshd") {
+        if (bad) printf "Failed password for invalid user admin%d from %s port %d ssh2\n", i % 97, ip, 30000 + i % 30000
+        else if (i % 2) printf "Accepted publickey for deploy from %s port %d ssh2: ED25519 SHA256:q2MYxC7Wr2BbV1cz3Yq8dJ4a\n", ip, 30000 + i % 30000
+        else printf "pam_unix(sshd:session): session opened for user deploy(uid=1000) by deploy(uid=0)\n"
+      } else if (fmt == "nginx-limit-req") {
+        nginx(ip, "GET /page-" i % 500 "/ HTTP/2.0", bad ? 429 : 200)
+      } else if (fmt == "wordpress-auth") {
+        if (bad) nginx(ip, "POST /wp-login.php HTTP/2.0", 200)
+        else if (i % 10 == 0) nginx(ip, "POST /wp-login.php HTTP/2.0", 302)
+        else nginx(ip, "GET /page-" i % 500 "/ HTTP/2.0", 200)
+      }
+    }
+    BEGIN {
+      srand(1)
+      for (i = 0; i < n; i++) {
+        bad = rand() * 100 < pct
+        line(bad, bad ? attacker(int(rand() * attackers)) : client(i), i)
+      }
+      for (i = 0; i < retries; i++) line(1, probe, i)
+    }'
+}
+
+# CPU ticks (user + system) of fail2ban-server
+CLK_TCK="$(getconf CLK_TCK)"
+f2b_ticks() {
+  local stat
+  read -r -a stat <"/proc/$(pgrep -xo fail2ban-server)/stat"
+  echo $((stat[13] + stat[14]))
+}
+
+status_field() { fail2ban-client status "$1" | sed -n "s/.*$2:\s*//p"; }
+
+: >"${WORK}/jails.jsonl"
+for name in $jails; do
+  jail="replay-${name}"
+  case "$name" in
+    sshd | nginx-limit-req | wordpress-auth) ;;
+    *)
+      echo "no log generator for ${name}, skipping" >&2
+      continue
+      ;;
+  esac
+  maxretry="$(fail2ban-client get "$jail" maxretry)"
+  gen "$name" "$LINES" "$maxretry" >"${WORK}/${name}.log"
+  total="$(wc -l <"${WORK}/${name}.log")"
+  failures="$(grep -c -E 'Failed password|"status":429|POST /wp-login.php HTTP/2.0","status":200' "${WORK}/${name}.log")"
+
+  fail2ban-client unban --all >/dev/null
+  failed_before="$(status_field "$jail" "Total failed")"
+  banned_before="$(status_field "$jail" "Total banned")"
+  ticks_before="$(f2b_ticks)"
+
+  echo "${jail}: writing ${total} lines (${failures} failures)" >&2
+  t_start="$EPOCHREALTIME"
+  if [[ -f "${LOG_DIR}/${name}.log" ]]; then
+    cat "${WORK}/${name}.log" >>"${LOG_DIR}/${name}.log"
+  else
+    # Through the journal, as the unit the replay jail's journalmatch selects
+    systemd-run --quiet --wait --collect --unit "${jail}" \
+      -p StandardInput=file:"${WORK}/${name}.log" -p StandardOutput=journal \
+      -p SyslogIdentifier="${name}" -p LogRateLimitIntervalSec=0 /bin/cat
+  fi
+  t_written="$EPOCHREALTIME"
+
+  t_ban=""
+  deadline=$((${t_start%.*} + TIMEOUT))
+  while ((${EPOCHREALTIME%.*} < deadline)); do
+    if fail2ban-client get "$jail" banip | tr -s ' ,' '\n' | grep -qxF "$PROBE"; then
+      t_ban="$EPOCHREALTIME"
+      break
+    fi
+    sleep 0.2
+  done
+  [[ -n "$t_ban" ]] || echo "${jail}: probe not banned within ${TIMEOUT}s" >&2
+
+  jq -n -c \
+    --arg jail "$name" \
+    --argjson lines "$total" \
+    --argjson failures "$failures" \
+    --argjson maxretry "$maxretry" \
+    --argjson t_start "$t_start" --argjson t_written "$t_written" --argjson t_ban "${t_ban:-null}" \
+    --argjson failed "$(($(status_field "$jail" "Total failed") - failed_before))" \
+    --argjson banned "$(($(status_field "$jail" "Total banned") - banned_before))" \
+    --argjson cpu "$(awk -v t=$(($(f2b_ticks) - ticks_before)) -v hz="$CLK_TCK" 'BEGIN { printf "%.2f", t / hz }')" \
+    'def r: . * 1000 | round / 1000;
+     {
+      jail: $jail,
+      source: (if $jail == "sshd" then "journal" else "file" end),
+      lines: $lines,
+      failures_written: $failures,
+      failures_counted: $failed,
+      bans: $banned,
+      maxretry: $maxretry,
+      write_seconds: ($t_written - $t_start | r),
+      time_to_ban_seconds: (if $t_ban == null then null else ($t_ban - $t_start | r) end),
+      ban_lag_seconds: (if $t_ban == null then null else ($t_ban - $t_written | r) end),
+      lines_per_second: (if $t_ban == null then null else ($lines / ($t_ban - $t_start) | round) end),
+      fail2ban_cpu_seconds: $cpu
+    }' >>"${WORK}/jails.jsonl"
+done
+
+jq -n \
+  --arg git_sha "${REPLAY_GIT_SHA:-}" \
+  --arg generated_at "$(date -u +%Y-%m-%dT%H:%M:%SZ)" \
+  --arg arch "$(uname -m)" \
+  --arg kernel "$(uname -r)" \
+  --arg fail2ban "$(fail2ban-client --version 2>&1 | grep -oE '[0-9]+\.[0-9.]+' | head -n1)" \
+  --argjson nproc "$(nproc)" \
+  --argjson attack_pct "$ATTACK_PCT" \
+  --argjson attackers "$ATTACKERS" \
+  --slurpfile jails "${WORK}/jails.jsonl" \
+  '{
+    schema: 1,
+    git_sha: $git_sha,
+    generated_at: $generated_at,
+    host: {arch: $arch, kernel: $kernel, nproc: $nproc, fail2ban: $fail2ban},
+    config: {attack_pct: $attack_pct, attackers: $attackers},
+    jails: $jails
+  }' >"$OUT"
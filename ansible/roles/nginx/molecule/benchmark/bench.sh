@@ -0,0 +1,151 @@
+#!/usr/bin/env bash
+# Runs inside the benchmark container (see verify.yml) and writes one JSON
+# document with every measurement to $1.
+#
+#   BENCH_SCENARIOS    scenario names to run (default: all below)
+#   BENCH_CONNECTIONS  concurrency levels (default: "1 16 64")
+#   BENCH_DURATION     seconds per wrk run (default: 10)
+#   BENCH_THREADS      wrk threads, capped at the connection count (default: nproc)
+#   BENCH_HANDSHAKES   TLS handshakes sampled per protocol and mode (default: 200)
+#   BENCH_GIT_SHA      commit being measured, recorded in the result
+#   BENCH_VARIANT      snippet variant being measured and its role variables
+#   BENCH_VARIANT_VARS (JSON); both set by `scripts/nginx-bench.sh variants`
+set -euo pipefail
+
+OUT="${1:?usage: bench.sh <output.json>}"
+HTTP=http://127.0.0.1:8081
+HTTPS=https://127.0.0.1:8443
+LUA=/usr/local/share/nginx-bench/wrk-json.lua
+CONNECTIONS="${BENCH_CONNECTIONS:-1 16 64}"
+DURATION="${BENCH_DURATION:-10}"
+THREADS="${BENCH_THREADS:-$(nproc)}"
+HANDSHAKES="${BENCH_HANDSHAKES:-200}"
+GZIP='Accept-Encoding: gzip'
+
+# name -> "url|header" (one optional extra request header)
+declare -A SCENARIO=(
+  [html_gzip]="${HTTP}/index.html|${GZIP}"
+  [html_identity]="${HTTP}/index.html|"
+  [static_css]="${HTTP}/assets/app.css|${GZIP}"
+  [static_js]="${HTTP}/assets/app.js|${GZIP}"
+  [static_png]="${HTTP}/assets/logo.png|"
+  [tls_keepalive]="${HTTPS}/index.html|${GZIP}"
+  [http_new_conn]="${HTTP}/index.html|Connection: close"
+  [tls_new_conn]="${HTTPS}/index.html|Connection: close"
+)
+ORDER="html_gzip html_identity static_css static_js static_png tls_keepalive http_new_conn tls_new_conn"
+SCENARIOS="${BENCH_SCENARIOS:-$ORDER}"
+
+WORK="$(mktemp -d)"
+trap 'rm -rf "$WORK"' EXIT
+
+# CPU time (user + system, clock ticks) of the nginx master and workers. wrk
+# shares the box, so CPU per request is taken from nginx's own counters.
+CLK_TCK="$(getconf CLK_TCK)"
+nginx_cpu_ticks() {
+  local pid ticks=0 stat
+  for pid in $(pgrep -x nginx); do
+    read -r -a stat <"/proc/${pid}/stat" || continue
+    ticks=$((ticks + stat[13] + stat[14]))
+  done
+  echo "$ticks"
+}
+
+for name in $SCENARIOS; do
+  [[ -n "${SCENARIO[$name]:-}" ]] || {
+    echo "unknown scenario: $name" >&2
+    exit 1
+  }
+  url="${SCENARIO[$name]%%|*}"
+  header="${SCENARIO[$name]#*|}"
+  args=()
+  [[ -n "$header" ]] && args+=(-H "$header")
+
+  # Response as the client sees it: wire size and caching headers
+  curl -sk -o /dev/null -D "${WORK}/headers" "${args[@]}" \
+    -w '{"status":%{http_code},"size_bytes":%{size_download}}' "$url" >"${WORK}/response.json"
+  jq -n --arg name "$name" --arg url "$url" --arg header "$header" \
+    --slurpfile r "${WORK}/response.json" \
+    --arg encoding "$(sed -n 's/^content-encoding: *//Ip' "${WORK}/headers" | tr -d '\r')" \
+    --arg cache_control "$(sed -n 's/^cache-control: *//Ip' "${WORK}/headers" | tr -d '\r')" \
+    --arg expires "$(sed -n 's/^expires: *//Ip' "${WORK}/headers" | tr -d '\r')" \
+    '{name: $name, url: $url, header: $header, response: ($r[0] + {content_encoding: $encoding,
+      cache_control: $cache_control, has_expires: ($expires != "")})}' >>"${WORK}/scenarios.jsonl"
+
+  for c in $CONNECTIONS; do
+    t=$((THREADS < c ? THREADS : c))
+    echo "== ${name} c=${c} t=${t} ${DURATION}s" >&2
+    cpu_before="$(nginx_cpu_ticks)"
+    run="$(BENCH_SCENARIO="$name" BENCH_CONNECTIONS_RUN="$c" \
+      wrk -t "$t" -c "$c" -d "${DURATION}s" --latency -s "$LUA" "${args[@]}" "$url" \
+      | sed -n 's/^BENCH_JSON //p')"
+    cpu_after="$(nginx_cpu_ticks)"
+    jq -c --argjson ticks $((cpu_after - cpu_before)) --argjson hz "$CLK_TCK" \
+      '. + {nginx_cpu_seconds: ($ticks / $hz),
+            nginx_cpu_ms_per_request: (if .requests > 0 then $ticks / $hz * 1000 / .requests else null end)}' \
+      <<<"$run" >>"${WORK}/runs.jsonl"
+  done
+done
+
+# Handshake cost per protocol: time from TCP connect to TLS established.
+#   full     one fresh curl per sample, so there is no session to resume
+#   resumed  one curl fetching the page over a new connection each time; curl
+#            offers the previous session, so this measures ssl_session_cache /
+#            ssl_session_tickets (the first, full, handshake is dropped)
+for _ in $(seq 0 "$HANDSHAKES"); do
+  printf 'url = "%s/index.html"\noutput = "/dev/null"\n' "$HTTPS"
+done >"${WORK}/resume.curlrc"
+
+handshake_samples() {
+  local proto="$1" mode="$2"
+  if [[ "$mode" == full ]]; then
+    for _ in $(seq 1 "$HANDSHAKES"); do
+      curl -sk -o /dev/null --tlsv"$proto" --tls-max "$proto" \
+        -w '%{time_connect} %{time_appconnect}\n' "${HTTPS}/index.html"
+    done
+  else
+    curl -sk --tlsv"$proto" --tls-max "$proto" -H 'Connection: close' -K "${WORK}/resume.curlrc" \
+      -w '%{time_connect} %{time_appconnect}\n' | tail -n +2
+  fi
+}
+
+for proto in 1.2 1.3; do
+  for mode in full resumed; do
+    handshake_samples "$proto" "$mode" | awk -v proto="TLSv${proto}" -v mode="$mode" '
+      { v[++n] = ($2 - $1) * 1000 }
+      END {
+        # insertion sort is fine for a few hundred samples
+        for (i = 2; i <= n; i++) { x = v[i]; for (j = i - 1; j > 0 && v[j] > x; j--) v[j + 1] = v[j]; v[j + 1] = x }
+        for (i = 1; i <= n; i++) sum += v[i]
+        printf "{\"protocol\":\"%s\",\"mode\":\"%s\",\"samples\":%d,\"mean_ms\":%.3f,\"p50_ms\":%.3f,\"p90_ms\":%.3f,\"p99_ms\":%.3f}\n",
+          proto, mode, n, sum / n, v[int(n * 0.5 + 0.5)], v[int(n * 0.9 + 0.5)], v[int(n * 0.99 + 0.5)]
+      }' >>"${WORK}/handshakes.jsonl"
+  done
+done
+
+jq -n \
+  --arg git_sha "${BENCH_GIT_SHA:-}" \
+  --arg variant "${BENCH_VARIANT:-}" \
+  --argjson variant_vars "${BENCH_VARIANT_VARS:-null}" \
+  --arg generated_at "$(date -u +%Y-%m-%dT%H:%M:%SZ)" \
+  --arg arch "$(uname -m)" \
+  --arg kernel "$(uname -r)" \
+  --arg nginx "$(nginx -v 2>&1 | sed 's|.*/||')" \
+  --arg openssl "$(openssl version | awk '{print $2}')" \
+  --argjson nproc "$(nproc)" \
+  --argjson duration "$DURATION" \
+  --argjson threads "$THREADS" \
+  --slurpfile scenarios "${WORK}/scenarios.jsonl" \
+  --slurpfile runs "${WORK}/runs.jsonl" \
+  --slurpfile handshakes "${WORK}/handshakes.jsonl" \
+  '{
+    schema: 1,
+    git_sha: $git_sha,
+    variant: (if $variant == "" then null else {name: $variant, vars: ($variant_vars // {})} end),
+    generated_at: $generated_at,
+    host: {arch: $arch, kernel: $kernel, nproc: $nproc, nginx: $nginx, openssl: $openssl},
+    config: {duration_seconds: $duration, max_threads: $threads},
+    scenarios: $scenarios,
+    runs: $runs,
+    tls_handshakes: $handshakes
+  }' >"$OUT"
@@ -0,0 +1,22 @@
+-- wrk reporter: prints one JSON object per run on a line starting with
+-- BENCH_JSON, which bench.sh picks out of wrk's normal output. Latencies are
+-- recorded by wrk in microseconds and reported here in milliseconds.
+local scenario = os.getenv("BENCH_SCENARIO") or "unnamed"
+local connections = tonumber(os.getenv("BENCH_CONNECTIONS_RUN") or "0")
+
+done = function(summary, latency, requests)
+  local seconds = summary.duration / 1e6
+  local e = summary.errors
+  local function ms(us) return us / 1000 end
+  io.write(string.format(
+    'BENCH_JSON {"scenario":"%s","connections":%d,"duration_seconds":%.3f,' ..
+    '"requests":%d,"bytes":%d,"requests_per_second":%.2f,"bytes_per_second":%.0f,' ..
+    '"latency_ms":{"mean":%.3f,"stdev":%.3f,"max":%.3f,"p50":%.3f,"p90":%.3f,"p99":%.3f,"p99_9":%.3f},' ..
+    '"errors":{"connect":%d,"read":%d,"write":%d,"status":%d,"timeout":%d}}\n',
+    scenario, connections, seconds,
+    summary.requests, summary.bytes, summary.requests / seconds, summary.bytes / seconds,
+    ms(latency.mean), ms(latency.stdev), ms(latency.max),
+    ms(latency:percentile(50)), ms(latency:percentile(90)),
+    ms(latency:percentile(99)), ms(latency:percentile(99.9)),
+    e.connect, e.read, e.write, e.status, e.timeout))
+end
@@ -0,0 +1,208 @@
+#!/usr/bin/env bash
+# Runs inside the benchmark container (see verify.yml) and writes one JSON
+# document with every measurement to $1. Expects the state converge.yml leaves
+# in BENCH_STATE_DIR (transit-init.json, primary-init.json).
+#
+#   BENCH_SCENARIOS     scenario names to run (default: all below)
+#   BENCH_CONNECTIONS   concurrency levels (default: "1 16 64")
+#   BENCH_DURATION      seconds per wrk run (default: 10)
+#   BENCH_THREADS       wrk threads, capped at the connection count (default: nproc)
+#   BENCH_KEYS          KV v2 secrets seeded and read/written at random (default: 1000)
+#   BENCH_VALUE_SIZE    bytes per secret value / transit plaintext (default: 256)
+#   BENCH_UNSEAL_RUNS   restarts per unseal measurement (default: 5)
+#   BENCH_GIT_SHA       commit being measured, recorded in the result
+set -euo pipefail
+
+OUT="${1:?usage: bench.sh <output.json>}"
+PRIMARY="${BENCH_PRIMARY_ADDR:-https://127.0.0.1:8200}"
+TRANSIT="${BENCH_TRANSIT_ADDR:-https://127.0.0.1:8201}"
+STATE="${BENCH_STATE_DIR:-/root/openbao-bench}"
+LUA=/usr/local/share/openbao-bench/openbao-bench.lua
+CONNECTIONS="${BENCH_CONNECTIONS:-1 16 64}"
+DURATION="${BENCH_DURATION:-10}"
+THREADS="${BENCH_THREADS:-$(nproc)}"
+KEYS="${BENCH_KEYS:-1000}"
+VALUE_SIZE="${BENCH_VALUE_SIZE:-256}"
+UNSEAL_RUNS="${BENCH_UNSEAL_RUNS:-5}"
+KV_MOUNT=bench-kv
+TRANSIT_PATH=transit
+
+# the unseal summary takes percentiles over these runs, so it needs at least one
+[[ "$UNSEAL_RUNS" =~ ^[1-9][0-9]*$ ]] || {
+  echo "BENCH_UNSEAL_RUNS must be a positive integer, got '${UNSEAL_RUNS}'" >&2
+  exit 1
+}
+
+# name -> "address|systemd unit"; KV on the primary, transit on the transit
+# instance (the one the primary's auto-unseal depends on)
+declare -A SCENARIO=(
+  [kv_write]="${PRIMARY}|openbao"
+  [kv_read]="${PRIMARY}|openbao"
+  [transit_encrypt]="${TRANSIT}|openbao-transit"
+  [transit_decrypt]="${TRANSIT}|openbao-transit"
+)
+ORDER="kv_write kv_read transit_encrypt transit_decrypt"
+SCENARIOS="${BENCH_SCENARIOS:-$ORDER}"
+
+WORK="$(mktemp -d)"
+trap 'rm -rf "$WORK"' EXIT
+
+PRIMARY_TOKEN="$(jq -r .root_token "${STATE}/primary-init.json")"
+TRANSIT_TOKEN="$(jq -r .root_token "${STATE}/transit-init.json")"
+TRANSIT_UNSEAL_KEY="$(jq -r '.unseal_keys_b64[0]' "${STATE}/transit-init.json")"
+
+# api <addr> <token> <method> <path> [json body]
+api() {
+  curl -sk -X "$3" -H "X-Vault-Token: $2" ${5:+-H 'Content-Type: application/json' -d "$5"} "$1/v1/$4"
+}
+health() { curl -sk -o /dev/null -w '%{http_code}' --max-time 1 "$1/v1/sys/health" || true; }
+now_ms() { echo $((${EPOCHREALTIME/./} / 1000)); }
+
+# wait_health <addr> <regex>: poll every 20 ms until the status code matches
+wait_health() {
+  local deadline=$(($(now_ms) + 120000))
+  until [[ "$(health "$1")" =~ ^($2)$ ]]; do
+    (($(now_ms) < deadline)) || {
+      echo "timed out waiting for $1 to answer $2" >&2
+      return 1
+    }
+    sleep 0.02
+  done
+}
+
+# --- fixtures ---
+api "$PRIMARY" "$PRIMARY_TOKEN" GET sys/mounts | jq -e ".\"${KV_MOUNT}/\"" >/dev/null \
+  || api "$PRIMARY" "$PRIMARY_TOKEN" POST "sys/mounts/${KV_MOUNT}" '{"type":"kv","options":{"version":"2"}}'
+# KV v2 needs a moment after mounting before it accepts writes
+for _ in $(seq 1 50); do
+  api "$PRIMARY" "$PRIMARY_TOKEN" GET "${KV_MOUNT}/config" | jq -e .data >/dev/null && break
+  sleep 0.2
+done
+api "$TRANSIT" "$TRANSIT_TOKEN" POST "${TRANSIT_PATH}/keys/bench" '{"type":"aes256-gcm96"}'
+
+VALUE="$(head -c "$VALUE_SIZE" /dev/zero | tr '\0' v)"
+PLAINTEXT="$(printf '%s' "$VALUE" | base64 -w0)"
+CIPHERTEXT="$(api "$TRANSIT" "$TRANSIT_TOKEN" POST "${TRANSIT_PATH}/encrypt/bench" "{\"plaintext\":\"${PLAINTEXT}\"}" | jq -r .data.ciphertext)"
+
+# Seed every key once so kv_read never hits a 404: one curl, one connection
+for i in $(seq 0 $((KEYS - 1))); do
+  printf 'url = "%s/v1/%s/data/key-%d"\ndata = "{\\"data\\":{\\"value\\":\\"%s\\"}}"\n' "$PRIMARY" "$KV_MOUNT" "$i" "$VALUE"
+  printf 'header = "X-Vault-Token: %s"\nheader = "Content-Type: application/json"\ninsecure\nsilent\noutput = "/dev/null"\nnext\n' "$PRIMARY_TOKEN"
+done >"${WORK}/seed.curlrc"
+curl -K "${WORK}/seed.curlrc"
+
+# CPU time (user + system, clock ticks) of a unit's main process. wrk shares
+# the box, so CPU per request is taken from the server's own counters.
+CLK_TCK="$(getconf CLK_TCK)"
+unit_cpu_ticks() {
+  local pid stat
+  pid="$(systemctl show -p MainPID --value "$1")"
+  read -r -a stat <"/proc/${pid}/stat" || {
+    echo 0
+    return
+  }
+  echo $((stat[13] + stat[14]))
+}
+
+# --- request latency under concurrency ---
+: >"${WORK}/runs.jsonl"
+for name in $SCENARIOS; do
+  [[ -n "${SCENARIO[$name]:-}" ]] || {
+    echo "unknown scenario: $name" >&2
+    exit 1
+  }
+  addr="${SCENARIO[$name]%%|*}"
+  unit="${SCENARIO[$name]#*|}"
+  token="$PRIMARY_TOKEN"
+  [[ "$unit" == openbao-transit ]] && token="$TRANSIT_TOKEN"
+
+  for c in $CONNECTIONS; do
+    t=$((THREADS < c ? THREADS : c))
+    echo "== ${name} c=${c} t=${t} ${DURATION}s" >&2
+    cpu_before="$(unit_cpu_ticks "$unit")"
+    run="$(BENCH_SCENARIO="$name" BENCH_CONNECTIONS_RUN="$c" BENCH_TOKEN="$token" BENCH_KEYS="$KEYS" \
+      BENCH_KV_MOUNT="$KV_MOUNT" BENCH_TRANSIT_PATH="$TRANSIT_PATH" BENCH_VALUE="$VALUE" \
+      BENCH_PLAINTEXT="$PLAINTEXT" BENCH_CIPHERTEXT="$CIPHERTEXT" \
+      wrk -t "$t" -c "$c" -d "${DURATION}s" --latency -s "$LUA" "$addr" \
+      | sed -n 's/^BENCH_JSON //p')"
+    cpu_after="$(unit_cpu_ticks "$unit")"
+    jq -c --arg unit "$unit" --argjson ticks $((cpu_after - cpu_before)) --argjson hz "$CLK_TCK" \
+      '. + {server: $unit, server_cpu_seconds: ($ticks / $hz),
+            server_cpu_ms_per_request: (if .requests > 0 then $ticks / $hz * 1000 / .requests else null end)}' \
+      <<<"$run" >>"${WORK}/runs.jsonl"
+  done
+done
+
+# --- time to unsealed ---
+# primary_restart  start of the primary until it answers 200; it unseals
+#                  itself through the transit (auto-unseal round trip)
+# transit_restart  start of the transit until it is sealed-but-listening, then
+#                  the manual unseal call until it answers 200
+# cold_start       both stopped (a reboot): transit start + unseal, then the
+#                  primary start + auto-unseal, end to end
+: >"${WORK}/unseal.jsonl"
+for r in $(seq 1 "$UNSEAL_RUNS"); do
+  echo "== unseal run ${r}/${UNSEAL_RUNS}" >&2
+
+  systemctl stop openbao
+  t0="$(now_ms)"
+  systemctl start --no-block openbao
+  wait_health "$PRIMARY" '[1-5][0-9][0-9]'
+  t1="$(now_ms)"
+  wait_health "$PRIMARY" 200
+  t2="$(now_ms)"
+  echo "{\"kind\":\"primary_restart\",\"listening_ms\":$((t1 - t0)),\"unsealed_ms\":$((t2 - t0))}" >>"${WORK}/unseal.jsonl"
+
+  systemctl stop openbao-transit
+  t0="$(now_ms)"
+  systemctl start --no-block openbao-transit
+  wait_health "$TRANSIT" 503
+  t1="$(now_ms)"
+  api "$TRANSIT" "" PUT sys/unseal "{\"key\":\"${TRANSIT_UNSEAL_KEY}\"}" >/dev/null
+  wait_health "$TRANSIT" 200
+  t2="$(now_ms)"
+  echo "{\"kind\":\"transit_restart\",\"listening_ms\":$((t1 - t0)),\"unseal_call_ms\":$((t2 - t1)),\"unsealed_ms\":$((t2 - t0))}" >>"${WORK}/unseal.jsonl"
+
+  systemctl stop openbao openbao-transit
+  t0="$(now_ms)"
+  systemctl start --no-block openbao-transit
+  wait_health "$TRANSIT" 503
+  api "$TRANSIT" "" PUT sys/unseal "{\"key\":\"${TRANSIT_UNSEAL_KEY}\"}" >/dev/null
+  wait_health "$TRANSIT" 200
+  t1="$(now_ms)"
+  systemctl start --no-block openbao
+  wait_health "$PRIMARY" 200
+  t2="$(now_ms)"
+  echo "{\"kind\":\"cold_start\",\"transit_unsealed_ms\":$((t1 - t0)),\"unsealed_ms\":$((t2 - t0))}" >>"${WORK}/unseal.jsonl"
+done
+
+jq -n \
+  --arg git_sha "${BENCH_GIT_SHA:-}" \
+  --arg generated_at "$(date -u +%Y-%m-%dT%H:%M:%SZ)" \
+  --arg arch "$(uname -m)" \
+  --arg kernel "$(uname -r)" \
+  --arg openbao "$(bao version | awk '{ print $2 }')" \
+  --arg storage "$(awk -F'"' '/^storage/ { print $2 }' /etc/openbao.d/config.hcl)" \
+  --argjson nproc "$(nproc)" \
+  --argjson duration "$DURATION" \
+  --argjson threads "$THREADS" \
+  --argjson keys "$KEYS" \
+  --argjson value_size "$VALUE_SIZE" \
+  --slurpfile runs "${WORK}/runs.jsonl" \
+  --slurpfile unseal "${WORK}/unseal.jsonl" \
+  'def stats: sort as $v | {p50: $v[(($v | length) - 1) / 2 | floor], max: $v[-1], mean: ((add / length) | round)};
+   def summary(kind): [$unseal[] | select(.kind == kind)] as $s
+     | {runs: ($s | length)}
+       + ([$s[0] | keys[] | select(endswith("_ms"))] | map({key: ., value: ([$s[][.]] | stats)}) | from_entries);
+  {
+    schema: 1,
+    git_sha: $git_sha,
+    generated_at: $generated_at,
+    host: {arch: $arch, kernel: $kernel, nproc: $nproc, openbao: $openbao},
+    config: {duration_seconds: $duration, max_threads: $threads, keys: $keys,
+             value_size_bytes: $value_size, storage_backend: $storage},
+    runs: $runs,
+    unseal: {primary_restart: summary("primary_restart"),
+             transit_restart: summary("transit_restart"),
+             cold_start: summary("cold_start")}
+  }' >"$OUT"
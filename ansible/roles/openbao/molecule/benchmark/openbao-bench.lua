@@ -0,0 +1,60 @@
+-- wrk request generator and reporter for bench.sh. The scenario is chosen
+-- with BENCH_SCENARIO; requests carry BENCH_TOKEN. Prints one JSON object per
+-- run on a line starting with BENCH_JSON, which bench.sh picks out of wrk's
+-- normal output. Latencies are recorded by wrk in microseconds and reported
+-- here in milliseconds.
+local scenario = os.getenv("BENCH_SCENARIO") or "unnamed"
+local connections = tonumber(os.getenv("BENCH_CONNECTIONS_RUN") or "0")
+local token = os.getenv("BENCH_TOKEN") or ""
+local keys = tonumber(os.getenv("BENCH_KEYS") or "1000")
+local kv = os.getenv("BENCH_KV_MOUNT") or "bench-kv"
+local transit = os.getenv("BENCH_TRANSIT_PATH") or "transit"
+local value = os.getenv("BENCH_VALUE") or ""
+local plaintext = os.getenv("BENCH_PLAINTEXT") or ""
+local ciphertext = os.getenv("BENCH_CIPHERTEXT") or ""
+
+local headers = { ["X-Vault-Token"] = token, ["Content-Type"] = "application/json" }
+local threads = {}
+
+setup = function(thread)
+  thread:set("id", #threads)
+  table.insert(threads, thread)
+end
+
+init = function()
+  math.randomseed(os.time() + (id or 0) * 7919)
+end
+
+request = function()
+  local key = math.random(0, keys - 1)
+  if scenario == "kv_read" then
+    return wrk.format("GET", "/v1/" .. kv .. "/data/key-" .. key, headers)
+  elseif scenario == "kv_write" then
+    return wrk.format("POST", "/v1/" .. kv .. "/data/key-" .. key, headers,
+      '{"data":{"value":"' .. value .. '"}}')
+  elseif scenario == "transit_encrypt" then
+    return wrk.format("POST", "/v1/" .. transit .. "/encrypt/bench", headers,
+      '{"plaintext":"' .. plaintext .. '"}')
+  elseif scenario == "transit_decrypt" then
+    return wrk.format("POST", "/v1/" .. transit .. "/decrypt/bench", headers,
+      '{"ciphertext":"' .. ciphertext .. '"}')
+  end
+  return wrk.format("GET", "/v1/sys/health")
+end
+
+done = function(summary, latency, requests)
+  local seconds = summary.duration / 1e6
+  local e = summary.errors
+  local function ms(us) return us / 1000 end
+  io.write(string.format(
+    'BENCH_JSON {"scenario":"%s","connections":%d,"duration_seconds":%.3f,' ..
+    '"requests":%d,"requests_per_second":%.2f,' ..
+    '"latency_ms":{"mean":%.3f,"stdev":%.3f,"max":%.3f,"p50":%.3f,"p90":%.3f,"p99":%.3f,"p99_9":%.3f},' ..
+    '"errors":{"connect":%d,"read":%d,"write":%d,"status":%d,"timeout":%d}}\n',
+    scenario, connections, seconds,
+    summary.requests, summary.requests / seconds,
+    ms(latency.mean), ms(latency.stdev), ms(latency.max),
+    ms(latency:percentile(50)), ms(latency:percentile(90)),
+    ms(latency:percentile(99)), ms(latency:percentile(99.9)),
+    e.connect, e.read, e.write, e.status, e.timeout))
+end
@@ -0,0 +1,205 @@
+"""
+Shared fixtures for the security_hardening testinfra suites.
+
+Each ``host.run``/``host.file``/``host.package`` call is a separate
+docker-exec/SSH round trip. The ``facts`` fixture gathers every sysctl value,
+file stat, package state, service state and loaded kernel module the suites
+need in ONE remote command, then caches the snapshot per host for the whole
+pytest session.
+"""
+
+import shlex
+
+import pytest
+
+# Everything the suites look at. Add new keys here rather than calling
+# host.run() from a test, so the snapshot stays a single round trip.
+SYSCTL_KEYS = [
+    "kernel.dmesg_restrict",
+    "kernel.kptr_restrict",
+    "kernel.yama.ptrace_scope",
+    "net.ipv4.conf.all.accept_redirects",
+    "net.ipv4.conf.default.accept_redirects",
+    "net.ipv4.conf.all.send_redirects",
+    "net.ipv4.conf.default.send_redirects",
+    "net.ipv4.conf.all.accept_source_route",
+    "net.ipv4.conf.default.accept_source_route",
+    "net.ipv4.icmp_echo_ignore_broadcasts",
+    "net.ipv4.tcp_syncookies",
+    "net.ipv4.ip_forward",
+]
+
+FILE_PATHS = [
+    "/.dockerenv",
+    "/run/.containerenv",
+    "/run/systemd/system",
+    "/etc",
+    "/etc/ssh",
+    "/root",
+    "/etc/passwd",
+    "/etc/shadow",
+    "/etc/gshadow",
+    "/etc/group",
+    "/boot/grub/grub.cfg",
+    "/etc/modprobe.d/blacklist-dccp.conf",
+    "/etc/modprobe.d/blacklist-sctp.conf",
+    "/etc/modprobe.d/blacklist-rds.conf",
+    "/etc/modprobe.d/blacklist-tipc.conf",
+    "/var/lib/aide/aide.db",
+    "/var/lib/aide/aide.db.new",
+    "/etc/aide/aide.conf",
+    "/etc/apt/apt.conf.d/50unattended-upgrades",
+    "/etc/apt/apt.conf.d/20auto-upgrades",
+    "/etc/crontab",
+    "/etc/cron.d",
+    "/etc/cron.daily",
+    "/etc/cron.hourly",
+    "/etc/cron.monthly",
+    "/etc/cron.weekly",
+    "/etc/cron.allow",
+    "/etc/at.allow",
+    "/etc/ssh/sshd_config",
+    "/etc/security/pwquality.conf",
+    "/etc/security/limits.conf",
+    "/etc/pam.d/common-password",
+    "/etc/sysctl.d/99-hardening.conf",
+    "/etc/audit/rules.d/audit.rules",
+    "/var/log/syslog",
+    "/var/log/auth.log",
+    "/var/log/kern.log",
+]
+
+PACKAGES = [
+    "aide",
+    "auditd",
+    "unattended-upgrades",
+    "openssh-server",
+    "iptables",
+    "apparmor",
+    "apparmor-utils",
+]
+
+SERVICES = [
+    "auditd",
+]
+
+
+END_MARKER = "__END__"
+
+
+class FileFact:
+    """Subset of testinfra's File interface backed by a cached stat()."""
+
+    def __init__(self, path, mode=None, user=None, group=None, kind=None):
+        self.path = path
+        self.exists = mode is not None
+        self.mode = mode
+        self.user = user
+        self.group = group
+        self.is_directory = kind == "directory"
+        self.is_file = kind is not None and kind.startswith("regular")
+
+
+class HostFacts:
+    """Snapshot of host state collected in a single remote command."""
+
+    def __init__(self):
+        self.sysctl = {}
+        self.files = {}
+        self.packages = {}
+        self.services = {}
+        self.modules = set()
+
+    def file(self, path):
+        """Return the cached stat for ``path`` (must be listed in FILE_PATHS)."""
+        if path not in self.files:
+            raise KeyError(f"{path} not collected; add it to FILE_PATHS in conftest.py")
+        return self.files[path]
+
+    def package_installed(self, name):
+        return self.packages[name]
+
+    def service_running(self, name):
+        return self.services[name][0]
+
+    def service_enabled(self, name):
+        return self.services[name][1]
+
+    @property
+    def in_container(self):
+        return self.file("/.dockerenv").exists or self.file("/run/.containerenv").exists
+
+    @property
+    def has_systemd(self):
+        return self.file("/run/systemd/system").exists
+
+
+def _build_script():
+    """Render the shell snippet that prints one tab-separated record per fact."""
+    lines = []
+    for key in SYSCTL_KEYS:
+        q = shlex.quote(key)
+        lines.append(f"printf 'sysctl\\t%s\\t%s\\n' {q} \"$(sysctl -n {q} 2>/dev/null)\"")
+    # stat prints nothing for missing paths, which is how we detect !exists
+    paths = " ".join(shlex.quote(p) for p in FILE_PATHS)
+    # -L follows symlinks, like host.file()
+    lines.append(f"stat -L -c 'file\t%n\t%a\t%U\t%G\t%F' {paths} 2>/dev/null")
+    pkgs = " ".join(shlex.quote(p) for p in PACKAGES)
+    lines.append(f"dpkg-query -W -f='package\\t${{Package}}\\t${{Status}}\\n' {pkgs} 2>/dev/null")
+    for svc in SERVICES:
+        q = shlex.quote(svc)
+        lines.append(
+            f"printf 'service\\t%s\\t%s\\t%s\\n' {q} "
+            f"\"$(systemctl is-active {q} 2>/dev/null)\" "
+            f"\"$(systemctl is-enabled {q} 2>/dev/null)\""
+        )
+    lines.append("sed 's/^/module\\t/; s/ .*//' /proc/modules 2>/dev/null")
+    # Only reached if every collector above ran; a missing marker means the
+    # snapshot is truncated and must not be trusted
+    lines.append(f"echo {END_MARKER}")
+    return "\n".join(lines)
+
+
+def parse_facts(output):
+    """Parse the tab-separated records emitted by the collector script."""
+    facts = HostFacts()
+    for path in FILE_PATHS:
+        facts.files[path] = FileFact(path)
+    for name in PACKAGES:
+        facts.packages[name] = False
+    for name in SERVICES:
+        facts.services[name] = (False, False)
+
+    for line in output.splitlines():
+        kind, _, rest = line.partition("\t")
+        fields = rest.split("\t")
+        if kind == "sysctl" and len(fields) == 2:
+            facts.sysctl[fields[0]] = fields[1].strip() or None
+        elif kind == "file" and len(fields) == 5:
+            path, mode, user, group, ftype = fields
+            facts.files[path] = FileFact(path, int(mode, 8), user, group, ftype)
+        elif kind == "package" and len(fields) == 2:
+            facts.packages[fields[0]] = fields[1].endswith("ok installed")
+        elif kind == "service" and len(fields) == 3:
+            facts.services[fields[0]] = (fields[1] == "active", fields[2] == "enabled")
+        elif kind == "module" and fields[0]:
+            facts.modules.add(fields[0])
+    return facts
+
+
+@pytest.fixture(scope="session")
+def _facts_cache():
+    """Per-host snapshots, shared by every test module in the session."""
+    return {}
+
+
+@pytest.fixture
+def facts(host, _facts_cache):
+    """Cached HostFacts for the current testinfra host."""
+    key = host.backend.get_pytest_id()
+    if key not in _facts_cache:
+        result = host.run(_build_script())
+        assert result.rc == 0, f"fact collection failed (rc={result.rc}): {result.stderr}"
+        assert result.stdout.rstrip().endswith(END_MARKER), "fact collection output is truncated"
+        _facts_cache[key] = parse_facts(result.stdout)
+    return _facts_cache[key]
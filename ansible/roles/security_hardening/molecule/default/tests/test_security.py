@@ -15,20 +15,17 @@ testinfra_hosts = testinfra.utils.ansible_runner.AnsibleRunner(
 class TestSecurityPackages:
     """Test that required security packages are installed"""
 
-    def test_aide_installed(self, host):
+    def test_aide_installed(self, facts):
         """AIDE file integrity checker should be installed"""
-        aide = host.package("aide")
-        assert aide.is_installed
+        assert facts.package_installed("aide")
 
-    def test_unattended_upgrades_installed(self, host):
+    def test_unattended_upgrades_installed(self, facts):
         """Unattended upgrades should be installed"""
-        pkg = host.package("unattended-upgrades")
-        assert pkg.is_installed
+        assert facts.package_installed("unattended-upgrades")
 
-    def test_auditd_installed(self, host):
+    def test_auditd_installed(self, facts):
         """Auditd should be installed"""
-        auditd = host.package("auditd")
-        assert auditd.is_installed
+        assert facts.package_installed("auditd")
 
 
 class TestKernelHardening:
@@ -47,11 +44,11 @@ class TestKernelHardening:
         ("net.ipv4.icmp_echo_ignore_broadcasts", "1"),
         ("net.ipv4.tcp_syncookies", "1"),
     ])
-    def test_sysctl_parameters(self, host, param, value):
+    def test_sysctl_parameters(self, facts, param, value):
         """Test that sysctl security parameters are set correctly"""
-        cmd = host.run(f"sysctl -n {param}")
-        assert cmd.stdout.strip() == value, \
-            f"Expected {param}={value}, got {cmd.stdout.strip()}"
+        actual = facts.sysctl.get(param)
+        assert actual == value, \
+            f"Expected {param}={value}, got {actual}"
 
 
 class TestFilePermissions:
@@ -64,10 +61,10 @@ class TestFilePermissions:
         ("/etc/group", 0o644),
         ("/boot/grub/grub.cfg", 0o600),
     ])
-    def test_file_permissions(self, host, filepath, expected_mode):
+    def test_file_permissions(self, facts, filepath, expected_mode):
         """Test that critical files have correct permissions"""
-        if host.file(filepath).exists:
-            file_mode = host.file(filepath).mode
+        if facts.file(filepath).exists:
+            file_mode = facts.file(filepath).mode
             if isinstance(expected_mode, tuple):
                 assert file_mode in expected_mode, \
                     f"{filepath} has mode {oct(file_mode)}, expected {expected_mode}"
@@ -85,11 +82,11 @@ class TestDisabledProtocols:
         "rds",
         "tipc",
     ])
-    def test_protocol_disabled(self, host, protocol):
+    def test_protocol_disabled(self, host, facts, protocol):
         """Test that uncommon protocols are blacklisted"""
         # Check if module is blacklisted
         blacklist_file = f"/etc/modprobe.d/blacklist-{protocol}.conf"
-        if host.file(blacklist_file).exists:
+        if facts.file(blacklist_file).exists:
             content = host.file(blacklist_file).content_string
             assert f"install {protocol} /bin/true" in content
 
@@ -99,29 +96,28 @@ class TestDisabledProtocols:
         "rds",
         "tipc",
     ])
-    def test_protocol_not_loaded(self, host, protocol):
+    def test_protocol_not_loaded(self, facts, protocol):
         """Test that uncommon protocols are not loaded"""
-        cmd = host.run(f"lsmod | grep -w {protocol}")
-        assert cmd.rc != 0, f"Protocol {protocol} should not be loaded"
+        assert protocol not in facts.modules, f"Protocol {protocol} should not be loaded"
 
 
 class TestAIDEConfiguration:
     """Test AIDE file integrity monitoring"""
 
-    def test_aide_database_initialized(self, host):
+    def test_aide_database_initialized(self, facts):
         """AIDE database should exist"""
         # Database location varies, check common paths
         db_paths = [
             "/var/lib/aide/aide.db",
             "/var/lib/aide/aide.db.new",
         ]
-        db_exists = any(host.file(path).exists for path in db_paths)
+        db_exists = any(facts.file(path).exists for path in db_paths)
         # Note: In fresh install, only aide.db.new exists
         assert db_exists, "AIDE database should exist"
 
-    def test_aide_config_exists(self, host):
+    def test_aide_config_exists(self, facts):
         """AIDE configuration should exist"""
-        config = host.file("/etc/aide/aide.conf")
+        config = facts.file("/etc/aide/aide.conf")
         assert config.exists
         assert config.is_file
 
@@ -149,21 +145,20 @@ class TestAutomaticUpdates:
 class TestAuditd:
     """Test auditd configuration and rules"""
 
-    def test_auditd_service_running(self, host):
+    def test_auditd_service_running(self, facts):
         """Auditd service should be running"""
         # Skip in containers (Docker/LXC) where auditd doesn't work properly
-        if host.file("/.dockerenv").exists or host.file("/run/.containerenv").exists:
+        if facts.in_container:
             pytest.skip("auditd doesn't work in containers")
-        if not host.file("/run/systemd/system").exists:
+        if not facts.has_systemd:
             pytest.skip("auditd service check requires systemd")
-        service = host.service("auditd")
-        if not service.is_running:
+        if not facts.service_running("auditd"):
             pytest.skip("auditd not running (expected in Docker)")
-        assert service.is_enabled
+        assert facts.service_enabled("auditd")
 
-    def test_audit_rules_loaded(self, host):
+    def test_audit_rules_loaded(self, host, facts):
         """Audit rules should be loaded"""
-        if not host.file("/run/systemd/system").exists:
+        if not facts.has_systemd:
             pytest.skip("auditctl requires systemd")
         cmd = host.run("auditctl -l")
         if cmd.rc != 0 and "Operation not permitted" in cmd.stderr:
@@ -176,14 +171,14 @@ class TestAuditd:
 class TestPasswordPolicy:
     """Test password policy configuration"""
 
-    def test_pam_pwquality_config(self, host):
+    def test_pam_pwquality_config(self, facts):
         """PAM password quality should be configured"""
         config_paths = [
             "/etc/security/pwquality.conf",
             "/etc/pam.d/common-password",
         ]
 
-        config_exists = any(host.file(path).exists for path in config_paths)
+        config_exists = any(facts.file(path).exists for path in config_paths)
         assert config_exists, "Password policy configuration should exist"
 
 
@@ -214,21 +209,20 @@ class TestCronPermissions:
         "/etc/cron.monthly",
         "/etc/cron.weekly",
     ])
-    def test_cron_permissions(self, host, filepath):
+    def test_cron_permissions(self, facts, filepath):
         """Cron directories should be owned by root"""
-        if host.file(filepath).exists:
-            assert host.file(filepath).user == "root"
-            assert host.file(filepath).group == "root"
+        if facts.file(filepath).exists:
+            assert facts.file(filepath).user == "root"
+            assert facts.file(filepath).group == "root"
 
 
 class TestSSHHardening:
     """Test SSH configuration (if present)"""
 
-    def test_ssh_config_exists(self, host):
+    def test_ssh_config_exists(self, facts):
         """SSH config should exist if SSH is installed"""
-        sshd = host.package("openssh-server")
-        if sshd.is_installed:
-            config = host.file("/etc/ssh/sshd_config")
+        if facts.package_installed("openssh-server"):
+            config = facts.file("/etc/ssh/sshd_config")
             assert config.exists
             assert config.user == "root"
             assert config.mode == 0o600 or config.mode == 0o644
@@ -237,10 +231,9 @@ class TestSSHHardening:
 class TestIPTables:
     """Test iptables/firewall configuration"""
 
-    def test_iptables_installed(self, host):
+    def test_iptables_installed(self, facts):
         """iptables should be installed"""
-        iptables = host.package("iptables")
-        if not iptables.is_installed:
+        if not facts.package_installed("iptables"):
             pytest.skip("iptables not installed by this role")
 
 
@@ -262,10 +255,9 @@ class TestCompilerRestriction:
 class TestMandatoryAccessControl:
     """Test MAC (AppArmor/SELinux) if enabled"""
 
-    def test_apparmor_status(self, host):
+    def test_apparmor_status(self, host, facts):
         """AppArmor should be active if installed"""
-        apparmor = host.package("apparmor")
-        if apparmor.is_installed:
+        if facts.package_installed("apparmor"):
             cmd = host.run("aa-status")
             # Should return 0 if AppArmor is working
             # Note: Might not work in Docker container
@@ -280,10 +272,10 @@ class TestLogFilePermissions:
         "/var/log/auth.log",
         "/var/log/kern.log",
     ])
-    def test_log_permissions(self, host, logpath):
+    def test_log_permissions(self, facts, logpath):
         """Log files should not be world-readable"""
-        if host.file(logpath).exists:
-            file_mode = host.file(logpath).mode
+        if facts.file(logpath).exists:
+            file_mode = facts.file(logpath).mode
             # Should not be world-readable (last digit should be 0)
             assert file_mode & 0o004 == 0, \
                 f"{logpath} should not be world-readable"
@@ -306,22 +298,22 @@ class TestCoreumps:
 class TestSummary:
     """Summary test - verify overall security posture"""
 
-    def test_security_baseline_met(self, host):
+    def test_security_baseline_met(self, facts):
         """Verify minimum security baseline is met"""
         checks = []
 
         # Critical packages installed
-        checks.append(host.package("aide").is_installed)
-        checks.append(host.package("auditd").is_installed)
-        checks.append(host.package("unattended-upgrades").is_installed)
+        checks.append(facts.package_installed("aide"))
+        checks.append(facts.package_installed("auditd"))
+        checks.append(facts.package_installed("unattended-upgrades"))
 
         # Critical files have correct permissions
-        checks.append(host.file("/etc/shadow").mode in (0o600, 0o640))
-        checks.append(host.file("/etc/passwd").mode == 0o644)
+        checks.append(facts.file("/etc/shadow").mode in (0o600, 0o640))
+        checks.append(facts.file("/etc/passwd").mode == 0o644)
 
         # Services running
-        if host.file("/run/systemd/system").exists:
-            checks.append(host.service("auditd").is_running)
+        if facts.has_systemd:
+            checks.append(facts.service_running("auditd"))
 
         # At least 80% of checks should pass
         pass_rate = sum(checks) / len(checks)
@@ -0,0 +1,192 @@
+#!/usr/bin/env bash
+# Regex throughput of the fail2ban filters named in the fail2ban role's
+# fail2ban_services, on recorded auth.log and nginx json_combined samples
+# (scripts/fail2ban-filter-bench/), so a careless failregex shows up in CI.
+#
+# Usage:
+#   scripts/fail2ban-filter-bench.sh run [OUT]        measure every filter, write JSON
+#                                                     (default: ${RESULTS_DIR}/fail2ban-filters-<sha>.json)
+#   scripts/fail2ban-filter-bench.sh compare BASE HEAD per-filter deltas between two result files
+#   scripts/fail2ban-filter-bench.sh check [REF]      measure the filters at REF (default: origin/main)
+#                                                     and in the working tree, then compare
+#
+#   BENCH_LINES=100000      lines fed to each filter (the samples are repeated)
+#   BENCH_REPEAT=3          runs per filter; the fastest is kept
+#   MAX_REGRESSION=25       compare/check exit 1 if a filter is this many % costlier
+#   FAIL2BAN_FILTER_DIR=/etc/fail2ban/filter.d   stock filters (sshd) that the role does not ship
+#
+# Absolute lines/s depend on the machine, so every sample is also timed with a
+# failregex that never matches. relative_cost = calibration lines/s / filter
+# lines/s is what compare checks. It stays comparable across runners and
+# between the two halves of a check.
+
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+ROLE_DIR="${ROLE_DIR:-${ROOT_DIR}/ansible/roles/fail2ban}"
+SAMPLE_DIR="${ROOT_DIR}/scripts/fail2ban-filter-bench"
+RESULTS_DIR="${RESULTS_DIR:-${ROOT_DIR}/.bench-results}"
+FILTER_DIR="${FAIL2BAN_FILTER_DIR:-/etc/fail2ban/filter.d}"
+LINES="${BENCH_LINES:-100000}"
+REPEAT="${BENCH_REPEAT:-3}"
+MAX_REGRESSION="${MAX_REGRESSION:-25}"
+CALIBRATION='^fail2ban-filter-bench calibration <HOST>$'
+
+log() { echo "[$(date +'%H:%M:%S')] $*" >&2; }
+usage() {
+  sed -n '2,21s/^# \{0,1\}//p' "${BASH_SOURCE[0]}" >&2
+  exit 1
+}
+
+# "name filter sample" per enabled-or-not service; nginx logpaths get the
+# json_combined sample, everything else (journal, auth.log) the sshd one
+services() {
+  python3 - "${ROLE_DIR}/defaults/main.yml" <<'PY'
+import sys, yaml
+for s in yaml.safe_load(open(sys.argv[1]))["fail2ban_services"]:
+    sample = "access.json.log" if "nginx" in str(s.get("logpath", "")) else "auth.log"
+    print(s["name"], s["filter"], sample)
+PY
+}
+
+# fail2ban-regex LOG REGEX|FILTER -> "lines matched missed ignored seconds", fastest of REPEAT
+measure() {
+  local i out best=""
+  for ((i = 0; i < REPEAT; i++)); do
+    out="$(fail2ban-regex --print-no-missed --print-no-ignored "$1" "$2" | awk '
+            /^Lines: / { lines = $2; ignored = $4; matched = $6; missed = $8 }
+            /processed in/ { gsub(/[^0-9.]/, "", $3); secs = $3 }
+            # fail2ban-regex prints hundredths; never report a zero duration
+            END { print lines + 0, matched + 0, missed + 0, ignored + 0, (secs > 0.01 ? secs : 0.01) }')"
+    if [[ -z "$best" ]] || awk -v a="${out##* }" -v b="${best##* }" 'BEGIN { exit !(a < b) }'; then
+      best="$out"
+    fi
+  done
+  echo "$best"
+}
+
+cmd_run() {
+  local out="${1:-}" work name filter sample file log lines matched missed ignored secs
+  local -A calibration=()
+  if [[ -z "$out" ]]; then
+    mkdir -p "${RESULTS_DIR}"
+    out="${RESULTS_DIR}/fail2ban-filters-$(git -C "${ROOT_DIR}" rev-parse --short HEAD).json"
+  fi
+  command -v fail2ban-regex >/dev/null || {
+    echo "fail2ban-regex not found (apt-get install fail2ban)" >&2
+    exit 1
+  }
+  work="$(mktemp -d)"
+  # shellcheck disable=SC2064  # expand now: work is local
+  trap "rm -rf '${work}'" EXIT
+
+  for sample in auth.log access.json.log; do
+    awk -v n="${LINES}" '{ l[NR] = $0 } END { for (i = 0; i < n; i++) print l[i % NR + 1] }' \
+      "${SAMPLE_DIR}/${sample}" >"${work}/${sample}"
+    read -r lines matched missed ignored secs < <(measure "${work}/${sample}" "${CALIBRATION}")
+    calibration[$sample]="$(awk -v l="$lines" -v s="$secs" 'BEGIN { printf "%.0f", l / s }')"
+    log "calibration ${sample}: ${calibration[$sample]} lines/s"
+  done
+
+  : >"${work}/filters.jsonl"
+  while read -r name filter sample; do
+    file="${ROLE_DIR}/files/filter-${filter}.conf"
+    [[ -f "$file" ]] || file="${FILTER_DIR}/${filter}.conf"
+    [[ -f "$file" ]] || {
+      log "${name}: filter ${filter} not found, skipping"
+      continue
+    }
+    log="${work}/${sample}"
+    read -r lines matched missed ignored secs < <(measure "$log" "$file")
+    log "${name}: ${lines} lines, ${matched} matched in ${secs}s"
+    jq -n -c --arg name "$name" --arg filter "$filter" --arg sample "$sample" \
+      --arg source "${file#"${ROLE_DIR}/"}" \
+      --argjson lines "$lines" --argjson matched "$matched" --argjson missed "$missed" \
+      --argjson ignored "$ignored" --argjson secs "$secs" --argjson calib "${calibration[$sample]}" '
+            ($lines / $secs | round) as $lps
+            | {name: $name, filter: $filter, source: $source, sample: $sample,
+               lines: $lines, matched: $matched, missed: $missed, ignored: $ignored,
+               seconds: $secs, lines_per_second: $lps,
+               calibration_lines_per_second: $calib,
+               relative_cost: ($calib / $lps * 1000 | round / 1000)}' >>"${work}/filters.jsonl"
+  done < <(services)
+
+  jq -n \
+    --arg git_sha "$(git -C "${ROLE_DIR}" rev-parse --short HEAD 2>/dev/null || true)" \
+    --arg generated_at "$(date -u +%Y-%m-%dT%H:%M:%SZ)" \
+    --arg arch "$(uname -m)" \
+    --arg fail2ban "$(fail2ban-regex --version 2>&1 | grep -oE '[0-9]+\.[0-9.]+' | head -n1)" \
+    --argjson nproc "$(nproc)" \
+    --argjson lines "${LINES}" \
+    --argjson repeat "${REPEAT}" \
+    --slurpfile filters "${work}/filters.jsonl" \
+    '{
+            schema: 1,
+            git_sha: $git_sha,
+            generated_at: $generated_at,
+            host: {arch: $arch, nproc: $nproc, fail2ban: $fail2ban},
+            config: {lines: $lines, repeat: $repeat},
+            filters: $filters
+        }' >"$out"
+  log "Results: ${out}"
+  echo "$out"
+}
+
+cmd_compare() {
+  local base="$1" head="$2" worse
+  jq -r -n --slurpfile a "${base}" --slurpfile b "${head}" '
+        def pct(x; y): if x == 0 then "n/a" else ((y - x) / x * 100 * 10 | round / 10 | tostring) + "%" end;
+        ($a[0].filters | map({key: .name, value: .}) | from_entries) as $old
+        | "# \($a[0].git_sha) -> \($b[0].git_sha)",
+          (["FILTER", "LINES/S", "REL_COST", "dCOST", "MATCHED"] | @tsv),
+          ($b[0].filters[] | $old[.name] as $o
+           | if $o == null then [.name, .lines_per_second, "new \(.relative_cost)", "-", .matched]
+             else [.name, "\($o.lines_per_second)->\(.lines_per_second)",
+                   "\($o.relative_cost)->\(.relative_cost)", pct($o.relative_cost; .relative_cost),
+                   (if $o.matched == .matched then "\(.matched)" else "\($o.matched)->\(.matched)" end)] end
+           | @tsv)
+    ' | awk -F'\t' '/^#/ { print; next } { printf "%-18s %22s %16s %8s %14s\n", $1, $2, $3, $4, $5 }'
+
+  worse="$(jq -r -n --slurpfile a "${base}" --slurpfile b "${head}" --argjson max "${MAX_REGRESSION}" '
+        ($a[0].filters | map({key: .name, value: .}) | from_entries) as $old
+        | $b[0].filters[] | $old[.name] as $o | select($o != null and $o.relative_cost > 0)
+        | select((.relative_cost - $o.relative_cost) / $o.relative_cost * 100 > $max) | .name')"
+  if [[ -n "${worse}" ]]; then
+    echo "Filter cost regressed by more than ${MAX_REGRESSION}%:" ${worse} >&2
+    exit 1
+  fi
+}
+
+# Both trees are measured by this script in one go, so runner speed cancels out
+cmd_check() {
+  local ref="${1:-origin/main}" tree base head
+  tree="$(mktemp -d)"
+  base="$(mktemp --suffix .json)" head="$(mktemp --suffix .json)"
+  # Registered before the worktree exists, so a failed measurement never
+  # leaves a stale worktree behind to block the next run
+  # shellcheck disable=SC2064  # expand now: tree, base and head are local
+  trap "git -C '${ROOT_DIR}' worktree remove --force '${tree}' 2>/dev/null; rm -rf '${tree}' '${base}' '${head}'" EXIT
+  git -C "${ROOT_DIR}" worktree add --detach --quiet "${tree}" "${ref}"
+  log "Measuring filters at ${ref}"
+  ROLE_DIR="${tree}/ansible/roles/fail2ban" "${BASH_SOURCE[0]}" run "${base}" >/dev/null
+  git -C "${ROOT_DIR}" worktree remove --force "${tree}"
+  log "Measuring filters in the working tree"
+  "${BASH_SOURCE[0]}" run "${head}" >/dev/null
+  cmd_compare "${base}" "${head}"
+}
+
+case "${1:-}" in
+  run)
+    [[ $# -le 2 ]] || usage
+    cmd_run "${2:-}"
+    ;;
+  compare)
+    [[ $# -eq 3 ]] || usage
+    cmd_compare "$2" "$3"
+    ;;
+  check)
+    [[ $# -le 2 ]] || usage
+    cmd_check "${2:-}"
+    ;;
+  *) usage ;;
+esac
@@ -0,0 +1,239 @@
+#!/usr/bin/env bash
+# Run the testinfra suites of the firewall, ssh_2fa and security_hardening roles
+# against every inventory host in parallel, over one persistent SSH connection
+# per host, and skip suites whose inputs have not changed since their last pass.
+#
+# Usage: scripts/fleet-verify.sh [host pattern]     (default: all)
+#   INVENTORY=ansible/inventory/hetzner.yml   inventory the hosts and SSH settings come from
+#   JOBS=8                                    hosts verified at the same time
+#   SUITES="firewall ssh_2fa security_hardening"
+#   FORCE=1                                   ignore the cache and run every suite
+#   SUDO=1                                    run checks through sudo (needs NOPASSWD)
+#   CONTROL_PERSIST=10m                       how long idle SSH masters stay open
+#
+# Each host gets an SSH ControlMaster before anything else runs; the fingerprint
+# command and every testinfra call of every suite then reuse that connection.
+#
+# Caching: for each suite a fingerprint of what its tests look at is computed on
+# the host in one round trip: stat (mode, owner, size, mtime, ctime) and sha256
+# of the watched files, the watched packages and units, and the output of a few
+# commands such as `sshd -T` or `iptables -S`. The suite's own test files are
+# part of the key too. A suite that passed with the same fingerprint is reported
+# as CACHED and not run again; failures are never cached.
+#
+# Logs and results: ${FLEET_DIR}/logs/<host>/<suite>.log, ${FLEET_DIR}/results.tsv
+
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+ROLES_DIR="${ROOT_DIR}/ansible/roles"
+INVENTORY="${INVENTORY:-${ROOT_DIR}/ansible/inventory/hetzner.yml}"
+PATTERN="${1:-all}"
+JOBS="${JOBS:-8}"
+SUITES="${SUITES:-firewall ssh_2fa security_hardening}"
+FORCE="${FORCE:-0}"
+SUDO="${SUDO:-1}"
+CONTROL_PERSIST="${CONTROL_PERSIST:-10m}"
+FLEET_DIR="${FLEET_DIR:-${ROOT_DIR}/.fleet-verify}"
+RESULTS_FILE="${FLEET_DIR}/results.tsv"
+
+log() { echo "[$(date +'%H:%M:%S')] $*"; }
+usage() {
+  sed -n '2,24s/^# \{0,1\}//p' "${BASH_SOURCE[0]}" >&2
+  exit 1
+}
+
+[[ "${PATTERN}" == -h || "${PATTERN}" == --help ]] && usage
+
+# --- What each suite depends on ---
+# FILES: content and stat; META: stat without size/mtime (logs, large DBs);
+# PACKAGES/UNITS: dpkg status and systemctl state; CMDS: output is hashed as-is.
+declare -A FILES META PACKAGES UNITS CMDS
+FILES[firewall]="/etc/ufw /etc/default/ufw"
+META[firewall]=""
+PACKAGES[firewall]="ufw iptables"
+UNITS[firewall]="ufw firewalld"
+CMDS[firewall]="iptables -S; ip6tables -S"
+
+FILES[ssh_2fa]="/etc/ssh /etc/pam.d/sshd /etc/pam.d/common-auth"
+META[ssh_2fa]=""
+PACKAGES[ssh_2fa]="openssh-server libpam-google-authenticator"
+UNITS[ssh_2fa]="ssh"
+CMDS[ssh_2fa]="sshd -T"
+
+FILES[security_hardening]="/etc/sysctl.d /etc/ssh /etc/passwd /etc/shadow /etc/group /etc/gshadow
+    /etc/login.defs /etc/security /etc/pam.d /etc/modprobe.d /etc/audit /etc/aide /etc/apt/apt.conf.d
+    /etc/crontab /etc/cron.d /etc/cron.allow /etc/at.allow /etc/default/grub /boot/grub/grub.cfg
+    /etc/profile /etc/bash.bashrc /etc/apparmor.d /etc/ufw/ufw.conf"
+META[security_hardening]="/etc /root /etc/cron.daily /etc/cron.hourly /etc/cron.weekly /etc/cron.monthly
+    /var/lib/aide/aide.db /var/lib/aide/aide.db.new /var/log/syslog /var/log/auth.log /var/log/kern.log
+    /.dockerenv /run/.containerenv /run/systemd/system"
+PACKAGES[security_hardening]="aide auditd unattended-upgrades openssh-server iptables apparmor apparmor-utils"
+UNITS[security_hardening]="auditd apparmor"
+CMDS[security_hardening]="sysctl kernel.dmesg_restrict kernel.kptr_restrict kernel.yama.ptrace_scope;
+    sysctl -a --pattern '^net\.ipv4\.(conf\.(all|default)\.|icmp_echo|tcp_syncookies|ip_forward)';
+    cut -d' ' -f1 /proc/modules | sort; auditctl -l; aa-status --enabled; echo \$?; faillock --user root"
+
+for suite in ${SUITES}; do
+  [[ -d "${ROLES_DIR}/${suite}/molecule/default/tests" && -v "FILES[${suite}]" ]] \
+    || {
+      echo "Unknown suite: ${suite}" >&2
+      exit 1
+    }
+done
+
+# Remote side: one "<suite>\t<sha256>" line per suite
+fingerprint_script() {
+  local suite files meta
+  echo 'fp() { sha256sum | cut -c1-64; }'
+  for suite in ${SUITES}; do
+    files="${FILES[${suite}]//$'\n'/ }"
+    meta="${META[${suite}]//$'\n'/ }"
+    cat <<EOF
+{
+    find ${files} -xdev \\( -type f -o -type d -o -type l \\) -printf '%p %m %u %g %s %T@ %C@\n' 2>/dev/null | sort
+    find ${files} -xdev -type f -exec sha256sum {} + 2>/dev/null | sort
+    stat -c '%n %a %U %G %F' ${meta} 2>/dev/null
+    dpkg-query -W -f='\${Package} \${Version} \${Status}\n' ${PACKAGES[${suite}]} 2>/dev/null
+    for u in ${UNITS[${suite}]}; do echo "\$u \$(systemctl is-active \$u 2>/dev/null) \$(systemctl is-enabled \$u 2>/dev/null)"; done
+    ( ${CMDS[${suite}]} ) 2>&1
+} | fp | sed 's/^/${suite}\t/'
+EOF
+  done
+}
+
+# Local side: the suite's tests are part of the key
+suite_hash() {
+  (cd "${ROLES_DIR}/$1/molecule/default/tests" && find . -name '*.py' -type f -print0 | sort -z | xargs -0 sha256sum) \
+    | sha256sum | cut -c1-64
+}
+
+# --- Hosts and SSH config ---
+command -v ansible-inventory >/dev/null || {
+  echo "ansible-inventory not found (pip install -r requirements-dev.txt)" >&2
+  exit 1
+}
+python3 -c 'import testinfra' 2>/dev/null || {
+  echo "testinfra not found (pip install -r requirements-dev.txt)" >&2
+  exit 1
+}
+
+mapfile -t HOSTS < <(ansible -i "${INVENTORY}" "${PATTERN}" --list-hosts 2>/dev/null | awk 'NR > 1 { print $1 }')
+[[ ${#HOSTS[@]} -gt 0 ]] || {
+  echo "No hosts match '${PATTERN}' in ${INVENTORY}" >&2
+  exit 1
+}
+
+# ControlPath has to stay under the ~104 byte socket path limit, hence /tmp
+RUN_DIR="$(mktemp -d /tmp/fleet-verify.XXXXXX)"
+SSH_CONFIG="${RUN_DIR}/ssh_config"
+export SSH_CONFIG
+
+close_masters() {
+  local host
+  for host in "${HOSTS[@]}"; do
+    ssh -F "${SSH_CONFIG}" -O exit "${host}" >/dev/null 2>&1 || true
+  done
+  rm -rf "${RUN_DIR}"
+}
+trap close_masters EXIT
+
+ansible-inventory -i "${INVENTORY}" --list | python3 -c '
+import json, sys
+hostvars = json.load(sys.stdin)["_meta"]["hostvars"]
+for name in sys.argv[3:]:
+    v = hostvars.get(name, {})
+    print("Host %s" % name)
+    print("    HostName %s" % v.get("ansible_host", name))
+    for opt, var in (("User", "ansible_user"), ("Port", "ansible_port"), ("IdentityFile", "ansible_ssh_private_key_file")):
+        if v.get(var):
+            print("    %s %s" % (opt, v[var]))
+print("Host *")
+print("    ControlMaster auto")
+print("    ControlPath %s/cm-%%C" % sys.argv[1])
+print("    BatchMode yes")
+print("    ControlPersist %s" % sys.argv[2])
+print("    ServerAliveInterval 15")
+print("    Include ~/.ssh/config")
+' "${RUN_DIR}" "${CONTROL_PERSIST}" "${HOSTS[@]}" >"${SSH_CONFIG}"
+
+fingerprint_script >"${RUN_DIR}/fingerprint.sh"
+for suite in ${SUITES}; do
+  printf '%s\t%s\n' "${suite}" "$(suite_hash "${suite}")"
+done >"${RUN_DIR}/suites.tsv"
+
+mkdir -p "${FLEET_DIR}/cache" "${FLEET_DIR}/logs"
+: >"${RESULTS_FILE}"
+
+# Runs in an xargs worker: one host, all suites, one result line per suite.
+verify_host() {
+  local host="$1" suite test_hash key start rc sudo=() pytest_sudo=()
+  local cache="${FLEET_DIR}/cache/${host}" logs="${FLEET_DIR}/logs/${host}"
+  local -A remote_fp
+  mkdir -p "${cache}" "${logs}"
+  if [[ "${SUDO}" == "1" ]]; then
+    sudo=(sudo -n)
+    pytest_sudo=(--sudo)
+  fi
+
+  # Opens the ControlMaster that everything below reuses
+  if ! ssh -F "${SSH_CONFIG}" "${host}" true >"${logs}/ssh.log" 2>&1; then
+    while IFS=$'\t' read -r suite _; do
+      printf '%s\t%s\t%s\t%s\n' "${host}" "${suite}" UNREACHABLE 0 >>"${RESULTS_FILE}"
+    done <"${RUN_DIR}/suites.tsv"
+    log "UNREACHABLE ${host} (see ${logs}/ssh.log)"
+    return 0
+  fi
+  while IFS=$'\t' read -r suite key; do
+    remote_fp[${suite}]="${key}"
+  done < <(ssh -F "${SSH_CONFIG}" "${host}" "${sudo[@]}" bash -s <"${RUN_DIR}/fingerprint.sh" 2>"${logs}/fingerprint.log")
+
+  # testinfra_hosts in the suites resolves through MOLECULE_INVENTORY_FILE;
+  # a one-host inventory keeps each worker on its own host
+  printf '%s\n' "${host}" >"${RUN_DIR}/inventory-${host}"
+
+  while IFS=$'\t' read -r suite test_hash; do
+    key="${remote_fp[${suite}]:-}"
+    [[ -n "${key}" ]] && key="${key}-${test_hash}"
+    if [[ "${FORCE}" != "1" && -n "${key}" && "$(cat "${cache}/${suite}" 2>/dev/null)" == "${key}" ]]; then
+      printf '%s\t%s\t%s\t%s\n' "${host}" "${suite}" CACHED 0 >>"${RESULTS_FILE}"
+      continue
+    fi
+    start=$(date +%s)
+    if MOLECULE_INVENTORY_FILE="${RUN_DIR}/inventory-${host}" python3 -m pytest -q -p no:cacheprovider \
+      --connection=ssh --ssh-config="${SSH_CONFIG}" --hosts="ssh://${host}" "${pytest_sudo[@]}" \
+      "${ROLES_DIR}/${suite}/molecule/default/tests" >"${logs}/${suite}.log" 2>&1; then
+      rc=0
+      # Only a green run with a known fingerprint is worth remembering
+      if [[ -n "${key}" ]]; then echo "${key}" >"${cache}/${suite}"; fi
+    else
+      rc=$?
+      rm -f "${cache}/${suite}"
+    fi
+    printf '%s\t%s\t%s\t%s\n' "${host}" "${suite}" "$([[ ${rc} -eq 0 ]] && echo PASS || echo FAIL)" \
+      "$(($(date +%s) - start))" >>"${RESULTS_FILE}"
+  done <"${RUN_DIR}/suites.tsv"
+  log "done ${host}"
+  return 0
+}
+export -f verify_host log
+export ROLES_DIR RUN_DIR FLEET_DIR RESULTS_FILE FORCE SUDO
+
+log "Verifying ${#HOSTS[@]} hosts with ${JOBS} workers, suites: ${SUITES} (logs: ${FLEET_DIR}/logs)"
+WALL_START=$(date +%s)
+printf '%s\n' "${HOSTS[@]}" | xargs -P "${JOBS}" -I{} bash -c 'verify_host "$1"' _ {}
+WALL=$(($(date +%s) - WALL_START))
+
+# --- Result table (failures first) ---
+echo
+printf '%-32s %-20s %-12s %8s\n' "HOST" "SUITE" "RESULT" "SECONDS"
+printf '%-32s %-20s %-12s %8s\n' "--------------------------------" "--------------------" "------------" "--------"
+sort -t$'\t' -k3,3r -k1,1 -k2,2 "${RESULTS_FILE}" | awk -F'\t' '{ printf "%-32s %-20s %-12s %8s\n", $1, $2, $3, $4 }'
+echo
+awk -F'\t' -v wall="${WALL}" '
+    { n[$3]++; total++ }
+    END {
+        printf "%d checks: %d passed, %d cached, %d failed, %d unreachable; %ds wall clock\n",
+            total, n["PASS"], n["CACHED"], n["FAIL"], n["UNREACHABLE"], wall
+        exit (n["FAIL"] + n["UNREACHABLE"] > 0)
+    }' "${RESULTS_FILE}"
@@ -0,0 +1,99 @@
+#!/usr/bin/env bash
+# Run the Molecule scenarios of all roles (or the ones given as arguments) across
+# a worker pool, on a shared pre-warmed base image, and print a per-role timing table.
+#
+# Usage: scripts/molecule-parallel.sh [role ...]
+#   JOBS=4               worker pool size (default: CPU count)
+#   MOLECULE_CMD=test    molecule sub-command to run per role
+#   MOLECULE_WARM=0      use the upstream image instead of the pre-warmed one
+#   REBUILD=1            force a rebuild of the pre-warmed image
+
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+ROLES_DIR="${ROOT_DIR}/ansible/roles"
+JOBS="${JOBS:-$(nproc)}"
+MOLECULE_CMD="${MOLECULE_CMD:-test}"
+MOLECULE_WARM="${MOLECULE_WARM:-1}"
+REBUILD="${REBUILD:-0}"
+# Same digest the nginx scenarios pin, so the warm image they are pointed at
+# through MOLECULE_DISTRO_IMAGE is built from the image they were written for.
+BASE_IMAGE="${MOLECULE_BASE_IMAGE:-geerlingguy/docker-debian13-ansible@sha256:d18f6c4b36b7ad9be9f2418375ea73d431fef86d314709497facb56a8f8e76c6}"
+# Tagged by base digest: bumping the pin builds a fresh image instead of reusing a stale one.
+BASE_TAG="latest"
+[[ "${BASE_IMAGE}" == *@sha256:* ]] && BASE_TAG="${BASE_IMAGE##*@sha256:}" && BASE_TAG="${BASE_TAG:0:12}"
+WARM_IMAGE="${MOLECULE_WARM_IMAGE:-hetzner-molecule-base:debian13-${BASE_TAG}}"
+LOG_DIR="${LOG_DIR:-${ROOT_DIR}/.molecule-logs}"
+RESULTS_FILE="${LOG_DIR}/results.tsv"
+
+log() { echo "[$(date +'%H:%M:%S')] $*"; }
+
+if [[ $# -gt 0 ]]; then
+  ROLES=("$@")
+else
+  mapfile -t ROLES < <(cd "${ROLES_DIR}" && for d in */molecule/default; do echo "${d%%/*}"; done)
+fi
+[[ ${#ROLES[@]} -gt 0 ]] || {
+  echo "No Molecule scenarios found under ${ROLES_DIR}" >&2
+  exit 1
+}
+
+# --- Pre-warmed base image ---
+if [[ "${MOLECULE_WARM}" == "1" ]]; then
+  if [[ "${REBUILD}" == "1" ]] || ! docker image inspect "${WARM_IMAGE}" >/dev/null 2>&1; then
+    log "Building pre-warmed base image ${WARM_IMAGE} (from ${BASE_IMAGE})"
+    docker build --pull \
+      --build-arg "BASE_IMAGE=${BASE_IMAGE}" \
+      -t "${WARM_IMAGE}" \
+      -f "${ROOT_DIR}/scripts/molecule/Dockerfile.base" \
+      "${ROOT_DIR}/scripts/molecule"
+  fi
+  export MOLECULE_DISTRO_IMAGE="${WARM_IMAGE}"
+fi
+
+mkdir -p "${LOG_DIR}"
+: >"${RESULTS_FILE}"
+
+# Runs in an xargs worker: one role, full output to its own log, one result line.
+run_role() {
+  local role="$1" start rc
+  start=$(date +%s)
+  if (cd "${ROLES_DIR}/${role}" && molecule "${MOLECULE_CMD}") >"${LOG_DIR}/${role}.log" 2>&1; then
+    rc=0
+  else
+    rc=$?
+  fi
+  printf '%s\t%s\t%s\n' "${role}" "${rc}" "$(($(date +%s) - start))" >>"${RESULTS_FILE}"
+  log "$([[ ${rc} -eq 0 ]] && echo PASS || echo FAIL) ${role}"
+  return 0
+}
+export -f run_role log
+export ROLES_DIR MOLECULE_CMD LOG_DIR RESULTS_FILE
+
+log "Running ${#ROLES[@]} scenarios with ${JOBS} workers (logs: ${LOG_DIR})"
+WALL_START=$(date +%s)
+printf '%s\n' "${ROLES[@]}" | xargs -P "${JOBS}" -I{} bash -c 'run_role "$1"' _ {}
+WALL=$(($(date +%s) - WALL_START))
+
+# --- Timing table (slowest first) ---
+FAILED=0
+SERIAL=0
+echo
+printf '%-24s %-6s %8s\n' "ROLE" "RESULT" "SECONDS"
+printf '%-24s %-6s %8s\n' "------------------------" "------" "--------"
+while IFS=$'\t' read -r role rc secs; do
+  SERIAL=$((SERIAL + secs))
+  if [[ "${rc}" -eq 0 ]]; then
+    printf '%-24s %-6s %8s\n' "${role}" "PASS" "${secs}"
+  else
+    FAILED=$((FAILED + 1))
+    printf '%-24s %-6s %8s   (see %s)\n' "${role}" "FAIL" "${secs}" "${LOG_DIR}/${role}.log"
+  fi
+done < <(sort -t$'\t' -k3,3nr "${RESULTS_FILE}")
+echo
+printf 'Wall time: %ss (sum of role times: %ss, %s workers)\n' "${WALL}" "${SERIAL}" "${JOBS}"
+
+[[ ${FAILED} -eq 0 ]] || {
+  echo "${FAILED} scenario(s) failed" >&2
+  exit 1
+}
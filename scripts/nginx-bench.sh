@@ -0,0 +1,192 @@
+#!/usr/bin/env bash
+# Reproducible nginx load benchmark on the nginx role's Molecule `benchmark`
+# scenario, with JSON results that can be compared between commits and
+# rendered into the performance docs.
+#
+# Usage:
+#   scripts/nginx-bench.sh run                 converge + benchmark, writes ${RESULTS_DIR}/<sha>.json
+#   scripts/nginx-bench.sh compare BASE HEAD   per-scenario deltas between two result files
+#   scripts/nginx-bench.sh report FILE         Markdown tables for docs/performance
+#   scripts/nginx-bench.sh variants [MATRIX]   benchmark every snippet variant in MATRIX
+#                                              (default: molecule/benchmark/variants.yml)
+#   scripts/nginx-bench.sh variants-report DIR side-by-side Markdown for a variants run
+#
+#   BENCH_CONNECTIONS="1 16 64"   concurrency levels        (run)
+#   BENCH_DURATION=10             seconds per wrk run       (run)
+#   BENCH_SCENARIOS="..."         subset of scenarios       (run, see molecule/benchmark/bench.sh)
+#   BENCH_TLS_KEY=rsa:2048        bench certificate key     (run)
+#   DESTROY=1                     remove the container afterwards (run)
+#   MAX_REGRESSION=10             compare exits 1 if any rps/p99 is this many % worse
+
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+ROLE_DIR="${ROOT_DIR}/ansible/roles/nginx"
+RESULTS_DIR="${RESULTS_DIR:-${ROOT_DIR}/.bench-results}"
+
+log() { echo "[$(date +'%H:%M:%S')] $*" >&2; }
+usage() {
+  sed -n '2,20s/^# \{0,1\}//p' "${BASH_SOURCE[0]}" >&2
+  exit 1
+}
+
+commit_id() {
+  local sha
+  sha="$(git -C "${ROOT_DIR}" rev-parse --short HEAD)"
+  git -C "${ROOT_DIR}" diff --quiet HEAD -- ansible/roles/nginx || sha="${sha}-dirty"
+  echo "${sha}"
+}
+
+cmd_run() {
+  local sha out
+  sha="$(commit_id)"
+  mkdir -p "${RESULTS_DIR}"
+  out="${RESULTS_DIR}/${sha}.json"
+
+  export BENCH_GIT_SHA="${sha}" BENCH_RESULTS_FILE="${out}"
+  log "Converging benchmark scenario"
+  (cd "${ROLE_DIR}" && molecule converge -s benchmark)
+  log "Running load matrix (connections: ${BENCH_CONNECTIONS:-1 16 64}, ${BENCH_DURATION:-10}s each)"
+  (cd "${ROLE_DIR}" && molecule verify -s benchmark)
+  if [[ "${DESTROY:-0}" == "1" ]]; then
+    (cd "${ROLE_DIR}" && molecule destroy -s benchmark)
+  fi
+  log "Results: ${out}"
+  echo "${out}"
+}
+
+# One converge + load run per variant, all under the same load profile, so the
+# only difference between results is the snippet variables.
+cmd_variants() {
+  local matrix="${1:-${ROLE_DIR}/molecule/benchmark/variants.yml}" sha dir name vars vars_file
+  local -a names
+  sha="$(commit_id)"
+  dir="${RESULTS_DIR}/variants-${sha}"
+  mkdir -p "${dir}"
+  mapfile -t names < <(python3 -c 'import sys, yaml; print("\n".join(yaml.safe_load(open(sys.argv[1]))["variants"]))' "${matrix}")
+  vars_file="$(mktemp --suffix .json)"
+  # shellcheck disable=SC2064  # expand now: vars_file is local
+  trap "rm -f '${vars_file}'" EXIT
+
+  export BENCH_GIT_SHA="${sha}"
+  for name in "${names[@]}"; do
+    vars="$(python3 -c 'import json, sys, yaml; print(json.dumps(yaml.safe_load(open(sys.argv[1]))["variants"][sys.argv[2]] or {}))' "${matrix}" "${name}")"
+    printf '%s\n' "${vars}" >"${vars_file}"
+    log "Variant ${name}: ${vars}"
+    (cd "${ROLE_DIR}" && molecule converge -s benchmark -- -e "@${vars_file}")
+    (cd "${ROLE_DIR}" && BENCH_VARIANT="${name}" BENCH_VARIANT_VARS="${vars}" \
+      BENCH_RESULTS_FILE="${dir}/${name}.json" molecule verify -s benchmark)
+  done
+  if [[ "${DESTROY:-0}" == "1" ]]; then
+    (cd "${ROLE_DIR}" && molecule destroy -s benchmark)
+  fi
+  log "Results: ${dir}"
+  cmd_variants_report "${dir}"
+}
+
+cmd_variants_report() {
+  jq -r -s '
+        sort_by(.generated_at) as $all
+        | def dash: if . == null or . == "" then "-" else tostring end;
+          def hs($r; p; m): [$r.tls_handshakes[] | select(.protocol == p and (.mode // "full") == m) | .p50_ms][0] | dash;
+          "_Generated by `scripts/nginx-bench.sh variants-report` from commit `\($all[0].git_sha)`; "
+          + "\($all[0].host.arch), \($all[0].host.nproc) vCPU, nginx \($all[0].host.nginx), "
+          + "\($all[0].config.duration_seconds)s per run._",
+          "",
+          "| Variant | Role variables |",
+          "|---------|----------------|",
+          ($all[] | "| \(.variant.name) | \(.variant.vars | to_entries | map("`\(.key)=\(.value)`") | join(" ") | dash) |"),
+          (($all[0].runs[] | {scenario, connections}) as $k
+          | "",
+            "#### \($k.scenario), \($k.connections) connections",
+            "",
+            "| Variant | Req/s | p50 (ms) | p99 (ms) | nginx CPU/req (ms) | Bytes on the wire |",
+            "|---------|------:|---------:|---------:|-------------------:|------------------:|",
+            ($all[] | . as $r
+             | ($r.runs[] | select(.scenario == $k.scenario and .connections == $k.connections)) as $run
+             | ([$r.scenarios[] | select(.name == $k.scenario) | .response.size_bytes][0]) as $bytes
+             | "| \($r.variant.name) | \($run.requests_per_second) | \($run.latency_ms.p50) | \($run.latency_ms.p99) | \($run.nginx_cpu_ms_per_request | if . == null then null else (. * 1000 | round / 1000) end | dash) | \($bytes | dash) |")),
+          "",
+          "#### TLS handshake p50 (ms)",
+          "",
+          "| Variant | TLSv1.2 full | TLSv1.2 resumed | TLSv1.3 full | TLSv1.3 resumed |",
+          "|---------|-------------:|----------------:|-------------:|----------------:|",
+          ($all[] | "| \(.variant.name) | \(hs(.; "TLSv1.2"; "full")) | \(hs(.; "TLSv1.2"; "resumed")) | \(hs(.; "TLSv1.3"; "full")) | \(hs(.; "TLSv1.3"; "resumed")) |")
+    ' "$1"/*.json
+}
+
+cmd_compare() {
+  local base="$1" head="$2"
+  jq -r -n --slurpfile a "${base}" --slurpfile b "${head}" '
+        def pct(x; y): if x == 0 then "n/a" else ((y - x) / x * 100 * 10 | round / 10 | tostring) + "%" end;
+        ($a[0].runs | map({key: "\(.scenario)/\(.connections)", value: .}) | from_entries) as $old
+        | "# \($a[0].git_sha) -> \($b[0].git_sha)",
+          (["SCENARIO", "CONN", "RPS", "dRPS", "P50_MS", "dP50", "P99_MS", "dP99"] | @tsv),
+          ($b[0].runs[] | . as $n | $old["\(.scenario)/\(.connections)"] as $o
+           | select($o != null)
+           | [.scenario, .connections,
+              "\($o.requests_per_second)->\(.requests_per_second)", pct($o.requests_per_second; .requests_per_second),
+              "\($o.latency_ms.p50)->\(.latency_ms.p50)", pct($o.latency_ms.p50; .latency_ms.p50),
+              "\($o.latency_ms.p99)->\(.latency_ms.p99)", pct($o.latency_ms.p99; .latency_ms.p99)] | @tsv),
+          ($b[0].tls_handshakes[] | . as $n
+           | ($a[0].tls_handshakes[] | select(.protocol == $n.protocol and (.mode // "full") == ($n.mode // "full"))) as $o
+           | ["handshake \(.protocol) \(.mode // "full")", "-", "-", "-",
+              "\($o.p50_ms)->\(.p50_ms)", pct($o.p50_ms; .p50_ms),
+              "\($o.p99_ms)->\(.p99_ms)", pct($o.p99_ms; .p99_ms)] | @tsv)
+    ' | awk -F'\t' '/^#/ { print; next } { printf "%-26s %5s %22s %8s %20s %8s %20s %8s\n", $1, $2, $3, $4, $5, $6, $7, $8 }'
+
+  if [[ -n "${MAX_REGRESSION:-}" ]]; then
+    local worse
+    worse="$(jq -r -n --slurpfile a "${base}" --slurpfile b "${head}" --argjson max "${MAX_REGRESSION}" '
+            ($a[0].runs | map({key: "\(.scenario)/\(.connections)", value: .}) | from_entries) as $old
+            | $b[0].runs[] | . as $n | $old["\(.scenario)/\(.connections)"] as $o | select($o != null)
+            | select(($o.requests_per_second > 0 and (.requests_per_second - $o.requests_per_second) / $o.requests_per_second * 100 < -$max)
+                  or ($o.latency_ms.p99 > 0 and (.latency_ms.p99 - $o.latency_ms.p99) / $o.latency_ms.p99 * 100 > $max))
+            | "\(.scenario)/\(.connections)"')"
+    if [[ -n "${worse}" ]]; then
+      echo "Regressed by more than ${MAX_REGRESSION}%:" ${worse} >&2
+      exit 1
+    fi
+  fi
+}
+
+cmd_report() {
+  jq -r '
+        "_Generated by `scripts/nginx-bench.sh report` from commit `\(.git_sha)` (\(.generated_at)); "
+        + "\(.host.arch), \(.host.nproc) vCPU, nginx \(.host.nginx), OpenSSL \(.host.openssl), "
+        + "\(.config.duration_seconds)s per run._",
+        "",
+        "| Scenario | Connections | Req/s | p50 (ms) | p90 (ms) | p99 (ms) | nginx CPU/req (ms) | Errors |",
+        "|----------|------------:|------:|---------:|---------:|---------:|-------------------:|-------:|",
+        (.runs[] | "| \(.scenario) | \(.connections) | \(.requests_per_second) | \(.latency_ms.p50) | \(.latency_ms.p90) | \(.latency_ms.p99) | \(.nginx_cpu_ms_per_request // "-" | if type == "number" then (. * 1000 | round / 1000) else . end) | \(.errors | add) |"),
+        "",
+        "| Response | Bytes on the wire | Content-Encoding | Cache-Control |",
+        "|----------|------------------:|------------------|---------------|",
+        (.scenarios[] | "| \(.name) | \(.response.size_bytes) | \(.response.content_encoding // "" | if . == "" then "-" else . end) | \(.response.cache_control | if . == "" then "-" else . end) |"),
+        "",
+        "| TLS handshake | Mode | Samples | Mean (ms) | p50 (ms) | p90 (ms) | p99 (ms) |",
+        "|---------------|------|--------:|----------:|---------:|---------:|---------:|",
+        (.tls_handshakes[] | "| \(.protocol) | \(.mode // "full") | \(.samples) | \(.mean_ms) | \(.p50_ms) | \(.p90_ms) | \(.p99_ms) |")
+    ' "$1"
+}
+
+case "${1:-}" in
+  run) cmd_run ;;
+  compare)
+    [[ $# -eq 3 ]] || usage
+    cmd_compare "$2" "$3"
+    ;;
+  report)
+    [[ $# -eq 2 ]] || usage
+    cmd_report "$2"
+    ;;
+  variants)
+    [[ $# -le 2 ]] || usage
+    cmd_variants "${2:-}"
+    ;;
+  variants-report)
+    [[ $# -eq 2 ]] || usage
+    cmd_variants_report "$2"
+    ;;
+  *) usage ;;
+esac
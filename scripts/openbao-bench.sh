@@ -0,0 +1,126 @@
+#!/usr/bin/env bash
+# OpenBao request-latency and unseal benchmark on the openbao role's Molecule
+# `benchmark` scenario (primary + transit auto-unseal instance in one
+# container), with JSON results that can be compared between commits, e.g.
+# when bumping openbao_version or changing storage settings.
+#
+# Usage:
+#   scripts/openbao-bench.sh run                 converge + benchmark, writes ${RESULTS_DIR}/openbao-<sha>.json
+#   scripts/openbao-bench.sh compare BASE HEAD   per-scenario and unseal deltas between two result files
+#   scripts/openbao-bench.sh report FILE         Markdown tables for docs/performance
+#
+#   BENCH_CONNECTIONS="1 16 64"   concurrency levels          (run)
+#   BENCH_DURATION=10             seconds per wrk run         (run)
+#   BENCH_SCENARIOS="..."         subset of scenarios         (run, see molecule/benchmark/bench.sh)
+#   BENCH_KEYS=1000               KV secrets in the working set (run)
+#   BENCH_UNSEAL_RUNS=5           restarts per unseal timing  (run)
+#   DESTROY=1                     remove the container afterwards (run)
+#   MAX_REGRESSION=10             compare exits 1 if any ops/s, p99 or time-to-unsealed is this many % worse
+
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+ROLE_DIR="${ROOT_DIR}/ansible/roles/openbao"
+RESULTS_DIR="${RESULTS_DIR:-${ROOT_DIR}/.bench-results}"
+
+log() { echo "[$(date +'%H:%M:%S')] $*" >&2; }
+usage() {
+  sed -n '2,19s/^# \{0,1\}//p' "${BASH_SOURCE[0]}" >&2
+  exit 1
+}
+
+commit_id() {
+  local sha
+  sha="$(git -C "${ROOT_DIR}" rev-parse --short HEAD)"
+  git -C "${ROOT_DIR}" diff --quiet HEAD -- ansible/roles/openbao || sha="${sha}-dirty"
+  echo "${sha}"
+}
+
+cmd_run() {
+  local sha out
+  # bench.sh checks this too, but only after the converge
+  [[ "${BENCH_UNSEAL_RUNS:-5}" =~ ^[1-9][0-9]*$ ]] || {
+    log "BENCH_UNSEAL_RUNS must be a positive integer, got '${BENCH_UNSEAL_RUNS}'"
+    exit 1
+  }
+  sha="$(commit_id)"
+  mkdir -p "${RESULTS_DIR}"
+  out="${RESULTS_DIR}/openbao-${sha}.json"
+
+  export BENCH_GIT_SHA="${sha}" BENCH_RESULTS_FILE="${out}"
+  log "Converging benchmark scenario (primary + transit auto-unseal)"
+  (cd "${ROLE_DIR}" && molecule converge -s benchmark)
+  log "Running load matrix (connections: ${BENCH_CONNECTIONS:-1 16 64}, ${BENCH_DURATION:-10}s each) and unseal timings"
+  (cd "${ROLE_DIR}" && molecule verify -s benchmark)
+  if [[ "${DESTROY:-0}" == "1" ]]; then
+    (cd "${ROLE_DIR}" && molecule destroy -s benchmark)
+  fi
+  log "Results: ${out}"
+  echo "${out}"
+}
+
+cmd_compare() {
+  local base="$1" head="$2"
+  jq -r -n --slurpfile a "${base}" --slurpfile b "${head}" '
+        def pct(x; y): if x == null or y == null or x == 0 then "n/a" else ((y - x) / x * 100 * 10 | round / 10 | tostring) + "%" end;
+        ($a[0].runs | map({key: "\(.scenario)/\(.connections)", value: .}) | from_entries) as $old
+        | "# \($a[0].git_sha) (OpenBao \($a[0].host.openbao)) -> \($b[0].git_sha) (OpenBao \($b[0].host.openbao))",
+          (["SCENARIO", "CONN", "OPS/S", "dOPS", "P50_MS", "dP50", "P99_MS", "dP99"] | @tsv),
+          ($b[0].runs[] | $old["\(.scenario)/\(.connections)"] as $o
+           | select($o != null)
+           | [.scenario, .connections,
+              "\($o.requests_per_second)->\(.requests_per_second)", pct($o.requests_per_second; .requests_per_second),
+              "\($o.latency_ms.p50)->\(.latency_ms.p50)", pct($o.latency_ms.p50; .latency_ms.p50),
+              "\($o.latency_ms.p99)->\(.latency_ms.p99)", pct($o.latency_ms.p99; .latency_ms.p99)] | @tsv),
+          ($b[0].unseal | to_entries[] | $a[0].unseal[.key] as $o | select($o != null)
+           | ["unseal \(.key)", "-", "-", "-",
+              "\($o.unsealed_ms.p50)->\(.value.unsealed_ms.p50)", pct($o.unsealed_ms.p50; .value.unsealed_ms.p50),
+              "max \($o.unsealed_ms.max)->\(.value.unsealed_ms.max)", pct($o.unsealed_ms.max; .value.unsealed_ms.max)] | @tsv)
+    ' | awk -F'\t' '/^#/ { print; next } { printf "%-24s %5s %22s %8s %20s %8s %24s %8s\n", $1, $2, $3, $4, $5, $6, $7, $8 }'
+
+  if [[ -n "${MAX_REGRESSION:-}" ]]; then
+    local worse
+    worse="$(jq -r -n --slurpfile a "${base}" --slurpfile b "${head}" --argjson max "${MAX_REGRESSION}" '
+            ($a[0].runs | map({key: "\(.scenario)/\(.connections)", value: .}) | from_entries) as $old
+            | ($b[0].runs[] | $old["\(.scenario)/\(.connections)"] as $o | select($o != null)
+               | select(($o.requests_per_second > 0 and (.requests_per_second - $o.requests_per_second) / $o.requests_per_second * 100 < -$max)
+                     or ($o.latency_ms.p99 > 0 and (.latency_ms.p99 - $o.latency_ms.p99) / $o.latency_ms.p99 * 100 > $max))
+               | "\(.scenario)/\(.connections)"),
+              ($b[0].unseal | to_entries[] | $a[0].unseal[.key] as $o | select($o != null)
+               | select($o.unsealed_ms.p50 > 0 and (.value.unsealed_ms.p50 - $o.unsealed_ms.p50) / $o.unsealed_ms.p50 * 100 > $max)
+               | "unseal/\(.key)")')"
+    if [[ -n "${worse}" ]]; then
+      echo "Regressed by more than ${MAX_REGRESSION}%:" ${worse} >&2
+      exit 1
+    fi
+  fi
+}
+
+cmd_report() {
+  jq -r '
+        "_Generated by `scripts/openbao-bench.sh report` from commit `\(.git_sha)` (\(.generated_at)); "
+        + "\(.host.arch), \(.host.nproc) vCPU, OpenBao \(.host.openbao), \(.config.storage_backend) storage, "
+        + "\(.config.keys) secrets of \(.config.value_size_bytes) B, \(.config.duration_seconds)s per run._",
+        "",
+        "| Scenario | Connections | Ops/s | p50 (ms) | p90 (ms) | p99 (ms) | Server CPU/op (ms) | Errors |",
+        "|----------|------------:|------:|---------:|---------:|---------:|-------------------:|-------:|",
+        (.runs[] | "| \(.scenario) | \(.connections) | \(.requests_per_second) | \(.latency_ms.p50) | \(.latency_ms.p90) | \(.latency_ms.p99) | \(.server_cpu_ms_per_request // "-" | if type == "number" then (. * 1000 | round / 1000) else . end) | \(.errors | add) |"),
+        "",
+        "| Time to unsealed | Runs | p50 (ms) | Max (ms) | Detail (p50) |",
+        "|------------------|-----:|---------:|---------:|--------------|",
+        (.unseal | to_entries[] | "| \(.key) | \(.value.runs) | \(.value.unsealed_ms.p50) | \(.value.unsealed_ms.max) | \(.value | to_entries | map(select(.key | endswith("_ms") and . != "unsealed_ms")) | map("\(.key) \(.value.p50)") | join(", ") | if . == "" then "-" else . end) |")
+    ' "$1"
+}
+
+case "${1:-}" in
+  run) cmd_run ;;
+  compare)
+    [[ $# -eq 3 ]] || usage
+    cmd_compare "$2" "$3"
+    ;;
+  report)
+    [[ $# -eq 2 ]] || usage
+    cmd_report "$2"
+    ;;
+  *) usage ;;
+esac